@@ -1,5 +1,5 @@
 import math
-from typing import Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 import tiktoken
 from openai import (
@@ -221,6 +221,7 @@ class LLM:
 
             # Add token counting related attributes
             self.total_input_tokens = 0
+            self.total_cached_tokens = 0
             self.max_input_tokens = (
                 llm_config.max_input_tokens
                 if hasattr(llm_config, "max_input_tokens")
@@ -263,12 +264,20 @@ class LLM:
     def count_message_tokens(self, messages: List[dict]) -> int:
         return self.token_counter.count_message_tokens(messages)
 
-    def update_token_count(self, input_tokens: int) -> None:
+    @staticmethod
+    def cached_prompt_tokens(usage: Any) -> int:
+        """Prompt tokens served from the provider's prompt cache, 0 if not reported"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        return getattr(details, "cached_tokens", None) or 0
+
+    def update_token_count(self, input_tokens: int, cached_tokens: int = 0) -> None:
         """Update token counts"""
         # Only track tokens if max_input_tokens is set
         self.total_input_tokens += input_tokens
+        self.total_cached_tokens += cached_tokens
         logger.info(
-            f"Token usage: Input={input_tokens}, Cumulative Input={self.total_input_tokens}"
+            f"Token usage: Input={input_tokens}, Cached={cached_tokens}, "
+            f"Cumulative Input={self.total_input_tokens}, Cumulative Cached={self.total_cached_tokens}"
         )
 
     def check_token_limit(self, input_tokens: int) -> bool:
@@ -423,7 +432,10 @@ class LLM:
                     raise ValueError("Empty or invalid response from LLM")
 
                 # Update token counts
-                self.update_token_count(response.usage.prompt_tokens)
+                self.update_token_count(
+                    response.usage.prompt_tokens,
+                    self.cached_prompt_tokens(response.usage),
+                )
 
                 return response.choices[0].message.content
 
@@ -584,7 +596,10 @@ class LLM:
                 if not response.choices or not response.choices[0].message.content:
                     raise ValueError("Empty or invalid response from LLM")
 
-                self.update_token_count(response.usage.prompt_tokens)
+                self.update_token_count(
+                    response.usage.prompt_tokens,
+                    self.cached_prompt_tokens(response.usage),
+                )
                 return response.choices[0].message.content
             else:
                 # Handle streaming request - 改善Ollama流式请求处理
@@ -729,7 +744,10 @@ class LLM:
                 raise ValueError("Invalid or empty response from LLM")
 
             # Update token counts
-            self.update_token_count(response.usage.prompt_tokens)
+            self.update_token_count(
+                response.usage.prompt_tokens,
+                self.cached_prompt_tokens(response.usage),
+            )
 
             return response.choices[0].message
 
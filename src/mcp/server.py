@@ -18,6 +18,27 @@ from mcp.server import FastMCP, Server
 from mcp.server.sse import SseServerTransport
 from src.logger import logger
 from src.tool import BaseTool, Terminate
+from src.utils.json_utils import json_default
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize a tool result to JSON, using orjson when it is installed.
+
+    Both paths write non-ASCII text as UTF-8 and accept the same values.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=str,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        ).decode()
+    return json.dumps(obj, ensure_ascii=False, default=json_default)
 
 
 logging.basicConfig(level=logging.INFO, handlers=[logging.StreamHandler(sys.stderr)])
@@ -56,9 +77,9 @@ class MCPServer:
 
             # Handle different types of results (match original logic)
             if hasattr(result, "model_dump"):
-                return json.dumps(result.model_dump())
+                return _dumps(result.model_dump())
             elif isinstance(result, dict):
-                return json.dumps(result)
+                return _dumps(result)
             return result
 
         # Set method metadata
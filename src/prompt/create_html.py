@@ -129,6 +129,7 @@ function renderDebateTimeline(debateHistory) {
 3. **性能**: CDN资源，无大型库依赖
 4. **兼容性**: 支持现代浏览器，优雅降级
 5. **完整性**: 一次性输出完整可运行的HTML文件
+6. **数据注入**: 只声明一次 `const reportData = __REPORT_DATA_PLACEHOLDER__;`，占位符原样保留，生成后会被实际数据替换
 
 ### 📤 输出格式要求
 严格按以下格式输出，不要任何额外解释：
@@ -488,8 +489,8 @@ CREATE_HTML_TEMPLATE_PROMPT = """
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js"></script>
     
     <script>
-        // 页面数据全局变量 - 将被填充实际数据
-        let reportData = {};
+        // 页面数据全局变量 - 占位符会被实际的JSON数据替换，请原样保留
+        const reportData = __REPORT_DATA_PLACEHOLDER__;
         
         // DOM加载完成后执行
         document.addEventListener('DOMContentLoaded', function() {
@@ -764,9 +765,6 @@ CREATE_HTML_TEMPLATE_PROMPT = """
                 });
             });
         }
-        
-        // 页面数据注入点 - 这里会被实际数据替换
-        const reportData = {}; // 这个会被实际的JSON数据替换
     </script>
 </body>
 </html>
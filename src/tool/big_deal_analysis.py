@@ -1,4 +1,5 @@
 from typing import Any, Dict
+import random
 import time
 import pandas as pd  # type: ignore
 
@@ -11,6 +12,27 @@ except ImportError:
     ak = None  # type: ignore
 
 
+def _with_retry(func, max_retry: int, sleep_seconds: float, *args, **kwargs):
+    """Retry wrapper for unstable akshare endpoints with exponential backoff and jitter."""
+    for attempt in range(1, max_retry + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt >= max_retry:
+                raise
+            logger.warning(f"{func.__name__} attempt {attempt} failed: {e}. Retrying...")
+            time.sleep(sleep_seconds * (1 << (attempt - 1)) + random.random() * 0.1)
+
+
+def _safe_fetch(func, max_retry: int, sleep_seconds: float, *args, **kwargs):
+    """Fetch data with retries; return None on ultimate failure instead of raising."""
+    try:
+        return _with_retry(func, max_retry, sleep_seconds, *args, **kwargs)
+    except Exception as e:
+        logger.warning(f"{func.__name__} failed after {max_retry} attempts: {e}")
+        return None
+
+
 class BigDealAnalysisTool(BaseTool):
     """Tool for analysing big order fund flows using akshare interfaces."""
 
@@ -45,7 +67,7 @@ class BigDealAnalysisTool(BaseTool):
             },
             "sleep_seconds": {
                 "type": "integer",
-                "description": "重试间隔秒数",
+                "description": "重试初始间隔秒数，之后按指数退避",
                 "default": 1,
             },
         },
@@ -67,27 +89,8 @@ class BigDealAnalysisTool(BaseTool):
         try:
             result: Dict[str, Any] = {}
 
-            def _with_retry(func, *args, **kwargs):
-                """Simple retry wrapper for unstable akshare endpoints."""
-                for attempt in range(1, max_retry + 1):
-                    try:
-                        return func(*args, **kwargs)
-                    except Exception as e:
-                        if attempt >= max_retry:
-                            raise
-                        logger.warning(f"{func.__name__} attempt {attempt} failed: {e}. Retrying...")
-                        time.sleep(sleep_seconds)
-
-            def _safe_fetch(func, *args, **kwargs):
-                """Fetch data with retries; return None on ultimate failure instead of raising."""
-                try:
-                    return _with_retry(func, *args, **kwargs)
-                except Exception as e:
-                    logger.warning(f"{func.__name__} failed after {max_retry} attempts: {e}")
-                    return None
-
             # Market wide big deal flow (逐笔大单)
-            df_bd = _safe_fetch(ak.stock_fund_flow_big_deal)
+            df_bd = _safe_fetch(ak.stock_fund_flow_big_deal, max_retry, sleep_seconds)
             if df_bd is not None and not df_bd.empty:
                 # 清洗数字列
                 def _to_float(series):
@@ -128,7 +131,7 @@ class BigDealAnalysisTool(BaseTool):
                 result["market_big_deal_samples"] = []
 
             # Individual fund flow rank 使用 stock_fund_flow_individual(symbol)
-            individual_rank = _safe_fetch(ak.stock_fund_flow_individual, symbol=rank_symbol)
+            individual_rank = _safe_fetch(ak.stock_fund_flow_individual, max_retry, sleep_seconds, symbol=rank_symbol)
 
             # 默认返回排行榜前 top_n 条
             result["individual_rank_top"] = (
@@ -147,13 +150,13 @@ class BigDealAnalysisTool(BaseTool):
 
             if stock_code:
                 # Stock specific fund flow trend 使用 stock_individual_fund_flow
-                individual_flow = _safe_fetch(ak.stock_individual_fund_flow, stock=stock_code)
+                individual_flow = _safe_fetch(ak.stock_individual_fund_flow, max_retry, sleep_seconds, stock=stock_code)
                 result["stock_fund_flow"] = (
                     individual_flow.to_dict(orient="records") if individual_flow is not None else []
                 )
 
                 # Historical price data for correlation
-                hist_price = _safe_fetch(ak.stock_zh_a_hist, symbol=stock_code, period="daily")
+                hist_price = _safe_fetch(ak.stock_zh_a_hist, max_retry, sleep_seconds, symbol=stock_code, period="daily")
                 if hist_price is not None:
                     result["stock_price_hist"] = hist_price.tail(120).to_dict(orient="records")
                 else:
@@ -162,7 +165,7 @@ class BigDealAnalysisTool(BaseTool):
                 # 1. 先整体抓取逐笔大单
                 # 复用已获取的 df_bd，若为空再尝试一次
                 if df_bd is None:
-                    df_bd = _safe_fetch(ak.stock_fund_flow_big_deal)
+                    df_bd = _safe_fetch(ak.stock_fund_flow_big_deal, max_retry, sleep_seconds)
 
                 stk_df = pd.DataFrame()
                 if df_bd is not None and not df_bd.empty:
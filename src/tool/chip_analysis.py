@@ -1,7 +1,10 @@
 import asyncio
-import sys
+import threading
 import time
+from bisect import bisect_right
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from types import MappingProxyType
 from typing import Any, Dict, List, Optional, Tuple
 
 import akshare as ak
@@ -12,6 +15,217 @@ from src.logger import logger
 from src.tool.base import BaseTool, ToolResult, get_recent_trading_day
 
 
+# akshare 接口超时时间（秒），超时后进入下一个备选数据源，避免整个分析被挂起
+_SPOT_TIMEOUT = 20  # 全市场快照需要分页拉取，耗时较长
+_HIST_TIMEOUT = 10
+_CYQ_TIMEOUT = 10
+
+
+async def _call_akshare(func, *args, timeout: float, **kwargs) -> Any:
+    """在工作线程中调用同步的 akshare 接口，超过 timeout 秒则抛出 TimeoutError"""
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(func, *args, **kwargs), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"{func.__name__} 调用超时（{timeout}秒）") from None
+
+
+# 全市场实时行情快照缓存，stock_zh_a_spot_em 每次都会拉取全部A股（约5000行）
+_SPOT_CACHE_TTL = 60  # 秒
+# 拉取失败后短时间内不再重试，避免排队等锁的请求依次再等待一次超时
+_SPOT_FAILURE_TTL = 15  # 秒
+# df为None且ts非零表示最近一次拉取失败
+_spot_cache: Dict[str, Any] = {"ts": 0.0, "df": None}
+_spot_lock = asyncio.Lock()
+
+# 筹码分布与股票信息结果缓存，键为 (数据类型, 股票代码, ..., 交易日)
+# 收盘后同一交易日的筹码分布基本不变，行情信息盘中会变化，故TTL较短
+_CHIP_CACHE_TTL = 12 * 3600  # 秒
+_STOCK_INFO_CACHE_TTL = 5 * 60  # 秒
+# 按最近使用顺序淘汰，长期运行的进程中缓存条目数不超过上限
+_RESULT_CACHE_SIZE = 256
+_result_cache: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+
+# 筹码分析的中间指标按输入内容缓存（LRU），同一份筹码数据重复分析时直接复用；分析在工作线程中执行，故使用线程锁
+# 缓存的是只读的指标与标签，每次调用据此重新组装结果字典，调用方修改结果不会影响缓存
+_ANALYSIS_CACHE_SIZE = 128
+# 中间指标：(只读的标量指标, 集中度趋势, (迁移方向代码, 筹码迁移, 筹码稳定性))
+_ChipFeatures = Tuple[MappingProxyType, str, Tuple[int, str, str]]
+_analysis_cache: "OrderedDict[Tuple, _ChipFeatures]" = OrderedDict()
+_analysis_cache_lock = threading.Lock()
+
+# 分级评估的阈值与对应标签：数值小于第i个阈值时取第i个标签，超过全部阈值取最后一个
+_CONTROL_LEVEL_THRESHOLDS = (10, 20, 30)
+_CONTROL_LEVEL_LABELS = ("低度控盘", "中度控盘", "高度控盘", "极度控盘")
+_TRAPPED_DEPTH_THRESHOLDS = (20, 40, 60)
+_TRAPPED_DEPTH_LABELS = ("轻度套牢", "中度套牢", "重度套牢", "深度套牢")
+_SELLING_PRESSURE_THRESHOLDS = (30, 60)
+_SELLING_PRESSURE_LABELS = ("抛压较小", "抛压中等", "抛压较大")
+_CONCENTRATION_LEVEL_THRESHOLDS = (15, 25, 35)
+_CONCENTRATION_LEVEL_LABELS = ("高度集中", "中度集中", "较为分散", "高度分散")
+_STABILITY_THRESHOLDS = (2, 5)
+_STABILITY_LABELS = ("筹码稳定", "筹码轻微波动", "筹码大幅波动")
+
+# 筹码迁移方向代码，与趋势方向标签一一对应
+_MIGRATION_UP, _MIGRATION_DOWN, _MIGRATION_FLAT = 0, 1, 2
+_TREND_DIRECTION_LABELS = ("上升趋势", "下降趋势", "震荡趋势")
+
+# A股特色分析说明，暂不依赖筹码数据
+_POLICY_IMPACT_TEXT = "需要结合具体政策事件分析"
+_HOT_MONEY_PATTERN_TEXT = "需要结合成交量和价格走势分析"
+_INSTITUTIONAL_ADJUSTMENT_TEXT = "需要结合机构持仓数据分析"
+_A_STOCK_CHARACTERISTICS_TEXT = "A股市场具有政策市、资金市特征，需要密切关注政策变化和资金流向"
+
+# 分析文本模板
+_MAIN_COST_TEXT_TPL = "主力成本乖离率%.2f%%，控盘程度：%s"
+_TRAPPED_TEXT_TPL = "套牢比例%.2f%%，套牢深度：%s"
+_CONCENTRATION_TEXT_TPL = "90%%集中度%.2f%%，70%%集中度%.2f%%"
+_TREND_TEXT_TPL = "筹码迁移：%s，筹码稳定性：%s"
+
+# 筹码分析用到的数值列
+_CHIP_NUMERIC_COLUMNS = ("价格", "筹码比例", "平均成本", "获利比例", "90%成本集中度", "70%成本集中度")
+
+
+async def _get_spot_em_cached() -> Optional[pd.DataFrame]:
+    """获取全市场实时行情快照，在TTL内复用，并按代码建立索引便于O(1)查找
+
+    拉取失败（异常或空结果）会在_SPOT_FAILURE_TTL内缓存，期间直接返回None。
+    """
+    async with _spot_lock:
+        cached_df = _spot_cache["df"]
+        age = time.time() - _spot_cache["ts"]
+        if cached_df is not None and age < _SPOT_CACHE_TTL:
+            return cached_df
+        if cached_df is None and age < _SPOT_FAILURE_TTL:
+            return None
+
+        try:
+            df = await _call_akshare(ak.stock_zh_a_spot_em, timeout=_SPOT_TIMEOUT)
+        except Exception:
+            _spot_cache["ts"] = time.time()
+            _spot_cache["df"] = None
+            raise
+        if df is None or df.empty:
+            _spot_cache["ts"] = time.time()
+            _spot_cache["df"] = None
+            return None
+
+        df = df.set_index("代码", drop=False)
+        _spot_cache["ts"] = time.time()
+        _spot_cache["df"] = df
+        return df
+
+
+# 最近交易日只随自然日变化，当天内复用
+_trading_day_cache: Dict[str, Any] = {}
+
+
+def _recent_trading_day() -> Tuple[str, datetime]:
+    """返回最近交易日的字符串(YYYY-MM-DD)与对应的datetime，同一天内只计算一次"""
+    today = datetime.now().date()
+    if _trading_day_cache.get("date") != today:
+        day_str = get_recent_trading_day()
+        _trading_day_cache["value"] = (day_str, datetime.strptime(day_str, "%Y-%m-%d"))
+        _trading_day_cache["date"] = today
+    return _trading_day_cache["value"]
+
+
+def _clean_stock_code(stock_code: str) -> str:
+    """去掉股票代码的市场前缀，如 'sh600519' -> '600519'"""
+    return stock_code[2:] if stock_code.startswith(("sh", "sz")) else stock_code
+
+
+def _cache_get(key: Tuple, ttl: float) -> Any:
+    """读取未过期的缓存结果，不存在或已过期时返回None"""
+    entry = _result_cache.get(key)
+    if entry is None:
+        return None
+    if time.time() - entry[0] >= ttl:
+        _result_cache.pop(key, None)
+        return None
+    _result_cache.move_to_end(key)
+    return entry[1]
+
+
+def _cache_set(key: Tuple, value: Any) -> None:
+    """写入缓存结果，超过上限时淘汰最久未使用的条目"""
+    _result_cache[key] = (time.time(), value)
+    _result_cache.move_to_end(key)
+    while len(_result_cache) > _RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+
+def _to_chip_columns(chip_distribution: Dict[str, List]) -> Dict[str, np.ndarray]:
+    """将按列存储的筹码分布转换为NumPy数组，只保留实际存在的数值列"""
+    return {
+        col: np.asarray(chip_distribution[col], dtype=np.float64)
+        for col in _CHIP_NUMERIC_COLUMNS
+        if col in chip_distribution
+    }
+
+
+def _trend_series(values: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """趋势分析至少需要两个数据点，不满足时返回None"""
+    return values if values is not None and values.size > 1 else None
+
+
+def _latest(cols: Dict[str, np.ndarray], col: str) -> Optional[float]:
+    """取某列的最新值，列不存在时返回None"""
+    values = cols.get(col)
+    return values[-1] if values is not None else None
+
+
+def _summarize_chips(cols: Dict[str, np.ndarray], current_price: float) -> Dict[str, Any]:
+    """一次性汇总各子分析需要的全部标量指标，缺失或为0的指标统一在此用估算值补齐
+    
+    - average_cost / profit_ratio: 优先取数据中的最新值，缺失时按筹码比例加权估算
+    - concentration_90 / concentration_70: 补齐默认值后的集中度
+    - raw_concentration_90 / raw_concentration_70: 数据中的原始集中度，缺失时为0
+    """
+    default_cost = current_price * 0.95 if current_price > 0 else 10.0
+    if not cols:
+        logger.warning("筹码分布数据为空，使用默认分析结果")
+        return {
+            "average_cost": default_cost,
+            "profit_ratio": 50.0,
+            "concentration_90": 80.0,
+            "concentration_70": 65.0,
+            "raw_concentration_90": 0,
+            "raw_concentration_70": 0,
+            "data_quality": "estimated",
+        }
+    
+    # 按筹码比例加权的平均成本与获利比例
+    weighted_cost = 0.0
+    weighted_profit_ratio = 0.0
+    prices = cols.get("价格")
+    weights = cols.get("筹码比例")
+    if prices is not None and weights is not None:
+        total = float(weights.sum())
+        if total > 0:
+            weighted_cost = float(np.dot(prices, weights)) / total
+            if current_price > 0:
+                weighted_profit_ratio = float(weights[prices < current_price].sum()) / total * 100
+    
+    avg_cost = _latest(cols, "平均成本")
+    if avg_cost is None:
+        avg_cost = weighted_cost
+    profit_ratio = _latest(cols, "获利比例")
+    if profit_ratio is None:
+        profit_ratio = weighted_profit_ratio
+    concentration_90 = _latest(cols, "90%成本集中度") or 0
+    concentration_70 = _latest(cols, "70%成本集中度") or 0
+    
+    return {
+        "average_cost": avg_cost if avg_cost != 0 else default_cost,
+        "profit_ratio": profit_ratio if profit_ratio != 0 else 50.0,
+        "concentration_90": concentration_90 if concentration_90 != 0 else 80.0,
+        "concentration_70": concentration_70 if concentration_70 != 0 else 65.0,
+        "raw_concentration_90": concentration_90,
+        "raw_concentration_70": concentration_70,
+        "data_quality": "processed",
+    }
+
+
 class ChipAnalysisTool(BaseTool):
     """筹码分析工具，用于分析股票的筹码分布和相关技术指标"""
 
@@ -46,17 +260,49 @@ class ChipAnalysisTool(BaseTool):
         **kwargs,
     ) -> ToolResult:
         """执行筹码分析"""
+        return (await self.execute_many([stock_code], adjust, analysis_days))[0]
+
+    async def execute_many(
+        self,
+        stock_codes: List[str],
+        adjust: str = "",
+        analysis_days: int = 5,
+    ) -> List[ToolResult]:
+        """批量执行筹码分析，结果顺序与stock_codes一致
+        
+        全市场实时行情和最近交易日在整批分析中只获取一次，各股票的筹码数据并发获取。
+        """
+        # 预先确定最近交易日，各股票共用
+        _recent_trading_day()
+        # 多只股票时先拉取一次实时行情快照，之后各股票直接命中缓存
+        if len(stock_codes) > 1:
+            try:
+                await _get_spot_em_cached()
+            except Exception as e:
+                logger.warning("批量预取实时行情失败: {}", e)
+        
+        results = await asyncio.gather(
+            *(self._analyze_single(code, adjust, analysis_days) for code in stock_codes),
+            return_exceptions=True,
+        )
+        return [
+            ToolResult(error=f"筹码分析错误: {str(r)}") if isinstance(r, BaseException) else r
+            for r in results
+        ]
+
+    async def _analyze_single(self, stock_code: str, adjust: str, analysis_days: int) -> ToolResult:
+        """对单只股票执行筹码分析"""
         try:
-            logger.info(f"开始筹码分析: {stock_code}")
+            logger.info("开始筹码分析: {}", stock_code)
             
-            # 获取筹码分布数据
-            chip_data = await self._get_chip_distribution(stock_code, adjust)
+            # 筹码分布与股票基本信息互不依赖，并发获取
+            chip_data, stock_info = await asyncio.gather(
+                self._get_chip_distribution(stock_code, adjust),
+                self._get_stock_info(stock_code),
+            )
             if not chip_data:
                 return ToolResult(error=f"无法获取股票 {stock_code} 的筹码分布数据")
             
-            # 获取股票基本信息
-            stock_info = await self._get_stock_info(stock_code)
-            
             # 进行筹码分析
             analysis_result = await self._analyze_chip_distribution(
                 chip_data, stock_info, analysis_days
@@ -70,7 +316,7 @@ class ChipAnalysisTool(BaseTool):
                 "analysis": analysis_result,
             }
             
-            logger.info(f"筹码分析完成: {stock_code}")
+            logger.info("筹码分析完成: {}", stock_code)
             return ToolResult(output=result)
             
         except Exception as e:
@@ -79,61 +325,81 @@ class ChipAnalysisTool(BaseTool):
             return ToolResult(error=error_msg)
 
     async def _get_chip_distribution(self, stock_code: str, adjust: str) -> Optional[Dict]:
-        """获取筹码分布数据"""
+        """获取筹码分布数据，同一交易日内复用已获取的结果"""
+        cache_key = ("chip", _clean_stock_code(stock_code), adjust, _recent_trading_day()[0])
+        chip_data = _cache_get(cache_key, _CHIP_CACHE_TTL)
+        if chip_data is not None:
+            return chip_data
+        
+        chip_data = await self._fetch_chip_distribution(stock_code, adjust)
+        # 默认兜底数据不缓存，下次调用时重新尝试获取
+        if chip_data and chip_data.get("data_source") != "default_fallback":
+            _cache_set(cache_key, chip_data)
+        return chip_data
+
+    async def _fetch_chip_distribution(self, stock_code: str, adjust: str) -> Optional[Dict]:
+        """从数据源获取筹码分布数据"""
         try:
             # 确保股票代码格式正确 - 移除任何市场前缀
-            clean_code = stock_code
-            if stock_code.startswith(('sh', 'sz')):
-                clean_code = stock_code[2:]
+            clean_code = _clean_stock_code(stock_code)
             
-            logger.info(f"尝试获取筹码分布数据: {clean_code}")
+            logger.info("尝试获取筹码分布数据: {}", clean_code)
             
             # 方法1: 尝试使用原始API - 只获取最近5个交易日
             try:
-                df = ak.stock_cyq_em(symbol=clean_code, adjust=adjust)
+                df = await _call_akshare(
+                    ak.stock_cyq_em, symbol=clean_code, adjust=adjust, timeout=_CYQ_TIMEOUT
+                )
                 if df is not None and not df.empty:
-                    # 只保留最近5个交易日的数据
+                    # 只保留最近5个交易日的数据，按列输出以减少重复的键
                     recent_df = df.tail(5)
-                    logger.info(f"成功获取筹码分布数据: {clean_code}, 原始数据行数: {len(df)}, 保留最近5天: {len(recent_df)}")
+                    logger.info("成功获取筹码分布数据: {}, 原始数据行数: {}, 保留最近5天: {}", clean_code, len(df), len(recent_df))
+                    
+                    # 接口返回RangeIndex，日期在"日期"列中
+                    if "日期" in recent_df.columns:
+                        dates = pd.to_datetime(recent_df["日期"]).dt.strftime("%Y-%m-%d").tolist()
+                    elif hasattr(recent_df.index, 'strftime'):
+                        dates = recent_df.index.strftime("%Y-%m-%d").tolist()
+                    else:
+                        dates = []
                     
                     chip_data = {
-                        "date": recent_df.index.strftime("%Y-%m-%d").tolist() if hasattr(recent_df.index, 'strftime') else [],
-                        "chip_distribution": recent_df.to_dict('records'),
+                        "date": dates,
+                        "chip_distribution": recent_df.to_dict('list'),
                         "data_source": "stock_cyq_em",
                         "data_range": "recent_5_days"
                     }
                     return chip_data
             except Exception as e:
-                logger.warning(f"stock_cyq_em失败: {clean_code}, 错误: {str(e)}")
+                logger.warning("stock_cyq_em失败: {}, 错误: {}", clean_code, e)
             
             # 方法2: 尝试替代方案 - 使用历史行情数据估算筹码分布
             try:
-                logger.info(f"尝试使用历史行情数据估算筹码分布: {clean_code}")
+                logger.info("尝试使用历史行情数据估算筹码分布: {}", clean_code)
                 
                 # 使用动态日期范围 - 获取最近10个交易日的数据（保证有足够数据）
-                from datetime import datetime, timedelta
-                recent_trading_day = datetime.strptime(get_recent_trading_day(), "%Y-%m-%d")
+                _, recent_trading_day = _recent_trading_day()
                 end_date = recent_trading_day.strftime("%Y%m%d")
                 start_date = (recent_trading_day - timedelta(days=15)).strftime("%Y%m%d")  # 15天前保证有足够交易日
                 
-                hist_df = ak.stock_zh_a_hist(symbol=clean_code, period="daily", 
-                                           start_date=start_date, end_date=end_date, adjust="qfq")
+                hist_df = await _call_akshare(
+                    ak.stock_zh_a_hist, symbol=clean_code, period="daily",
+                    start_date=start_date, end_date=end_date, adjust="qfq",
+                    timeout=_HIST_TIMEOUT,
+                )
                 
                 if hist_df is not None and not hist_df.empty:
                     # 只使用最近5个交易日的数据
                     recent_data = hist_df.tail(5)
                     
-                    # 简单的筹码分布估算
-                    chip_distribution = []
-                    for _, row in recent_data.iterrows():
-                        chip_info = {
-                            "日期": row["日期"],
-                            "价格": row["收盘"],
-                            "成交量": row["成交量"],
-                            "成交额": row["成交额"],
-                            "筹码比例": min(row["换手率"] * 0.1, 10.0) if "换手率" in row else 1.0  # 估算筹码比例
-                        }
-                        chip_distribution.append(chip_info)
+                    # 简单的筹码分布估算，按列整体计算
+                    estimated = recent_data[["日期", "收盘", "成交量", "成交额"]].rename(columns={"收盘": "价格"})
+                    if "换手率" in recent_data.columns:
+                        # 估算筹码比例
+                        estimated["筹码比例"] = np.minimum(recent_data["换手率"].to_numpy() * 0.1, 10.0)
+                    else:
+                        estimated["筹码比例"] = 1.0
+                    chip_distribution = estimated.to_dict("list")
                     
                     chip_data = {
                         "date": recent_data["日期"].tolist(),
@@ -141,51 +407,65 @@ class ChipAnalysisTool(BaseTool):
                         "data_source": "estimated_from_hist",
                         "data_range": "recent_5_days"
                     }
-                    logger.info(f"成功使用历史数据估算筹码分布: {clean_code}, 数据时间范围: {recent_data['日期'].min()} 到 {recent_data['日期'].max()}")
+                    logger.opt(lazy=True).info(
+                        "成功使用历史数据估算筹码分布: {}, 数据时间范围: {} 到 {}",
+                        lambda: clean_code,
+                        lambda: recent_data['日期'].min(),
+                        lambda: recent_data['日期'].max(),
+                    )
                     return chip_data
                     
             except Exception as e:
-                logger.warning(f"历史行情数据获取失败: {clean_code}, 错误: {str(e)}")
+                logger.warning("历史行情数据获取失败: {}, 错误: {}", clean_code, e)
             
             # 方法3: 返回模拟数据以避免完全失败
-            logger.warning(f"所有方法失败，返回默认数据: {clean_code}")
-            current_date = get_recent_trading_day()
+            logger.warning("所有方法失败，返回默认数据: {}", clean_code)
+            current_date, _ = _recent_trading_day()
             default_data = {
                 "date": [current_date],
-                "chip_distribution": [{
-                    "日期": current_date,
-                    "价格": 0.0,
-                    "成交量": 0,
-                    "成交额": 0.0,
-                    "筹码比例": 0.0,
-                    "说明": "数据获取失败，使用默认值"
-                }],
+                "chip_distribution": {
+                    "日期": [current_date],
+                    "价格": [0.0],
+                    "成交量": [0],
+                    "成交额": [0.0],
+                    "筹码比例": [0.0],
+                    "说明": ["数据获取失败，使用默认值"]
+                },
                 "data_source": "default_fallback"
             }
             return default_data
             
         except Exception as e:
-            logger.error(f"获取筹码分布数据失败: {stock_code}, {str(e)}")
+            logger.error("获取筹码分布数据失败: {}, {}", stock_code, e)
             return None
 
     async def _get_stock_info(self, stock_code: str) -> Dict:
-        """获取股票基本信息"""
+        """获取股票基本信息，短时间内复用已获取的结果"""
+        cache_key = ("stock_info", _clean_stock_code(stock_code), _recent_trading_day()[0])
+        stock_info = _cache_get(cache_key, _STOCK_INFO_CACHE_TTL)
+        if stock_info is not None:
+            return stock_info
+        
+        stock_info = await self._fetch_stock_info(stock_code)
+        # 只缓存真实数据，默认值和错误结果不缓存
+        if stock_info.get("data_source") in ("spot_em", "hist_latest"):
+            _cache_set(cache_key, stock_info)
+        return stock_info
+
+    async def _fetch_stock_info(self, stock_code: str) -> Dict:
+        """从数据源获取股票基本信息"""
         try:
             # 确保股票代码格式正确
-            clean_code = stock_code
-            if stock_code.startswith(('sh', 'sz')):
-                clean_code = stock_code[2:]
+            clean_code = _clean_stock_code(stock_code)
             
-            logger.info(f"尝试获取股票基本信息: {clean_code}")
+            logger.info("尝试获取股票基本信息: {}", clean_code)
             
             # 方法1: 尝试使用实时行情API
             try:
-                stock_info = ak.stock_zh_a_spot_em()
+                stock_info = await _get_spot_em_cached()
                 if stock_info is not None and not stock_info.empty:
-                    stock_detail = stock_info[stock_info['代码'] == clean_code]
-                    
-                    if not stock_detail.empty:
-                        detail = stock_detail.iloc[0]
+                    if clean_code in stock_info.index:
+                        detail = stock_info.loc[clean_code]
                         return {
                             "name": detail.get('名称', f'股票{clean_code}'),
                             "current_price": detail.get('最新价', 0.0),
@@ -197,16 +477,19 @@ class ChipAnalysisTool(BaseTool):
                             "data_source": "spot_em"
                         }
             except Exception as e:
-                logger.warning(f"实时行情获取失败: {clean_code}, 错误: {str(e)}")
+                logger.warning("实时行情获取失败: {}, 错误: {}", clean_code, e)
             
             # 方法2: 尝试使用历史数据的最新记录
             try:
-                recent_trading_day = datetime.strptime(get_recent_trading_day(), "%Y-%m-%d")
+                _, recent_trading_day = _recent_trading_day()
                 end_date = recent_trading_day.strftime("%Y%m%d")
                 start_date = (recent_trading_day - timedelta(days=7)).strftime("%Y%m%d")  # 7天前保证有数据
                 
-                hist_df = ak.stock_zh_a_hist(symbol=clean_code, period="daily", 
-                                           start_date=start_date, end_date=end_date, adjust="")
+                hist_df = await _call_akshare(
+                    ak.stock_zh_a_hist, symbol=clean_code, period="daily",
+                    start_date=start_date, end_date=end_date, adjust="",
+                    timeout=_HIST_TIMEOUT,
+                )
                 if hist_df is not None and not hist_df.empty:
                     latest = hist_df.iloc[-1]
                     return {
@@ -221,7 +504,7 @@ class ChipAnalysisTool(BaseTool):
                         "data_date": latest.get('日期', '').strftime('%Y-%m-%d') if hasattr(latest.get('日期', ''), 'strftime') else str(latest.get('日期', ''))
                     }
             except Exception as e:
-                logger.warning(f"历史数据获取失败: {clean_code}, 错误: {str(e)}")
+                logger.warning("历史数据获取失败: {}, 错误: {}", clean_code, e)
             
             # 方法3: 返回默认信息
             return {
@@ -237,79 +520,9 @@ class ChipAnalysisTool(BaseTool):
             }
             
         except Exception as e:
-            logger.error(f"获取股票基本信息失败: {stock_code}, {str(e)}")
+            logger.error("获取股票基本信息失败: {}, {}", stock_code, e)
             return {"error": str(e), "data_source": "error"}
 
-    async def _get_alternative_data_sources(self, stock_code: str) -> Optional[Dict]:
-        """获取替代数据源"""
-        try:
-            clean_code = stock_code.replace('sh', '').replace('sz', '')
-            
-            # 尝试多个数据源
-            data_sources = []
-            
-            # 1. 尝试东方财富实时数据
-            try:
-                realtime_data = ak.stock_zh_a_spot_em()
-                if realtime_data is not None and not realtime_data.empty:
-                    stock_data = realtime_data[realtime_data['代码'] == clean_code]
-                    if not stock_data.empty:
-                        data_sources.append({
-                            "source": "eastmoney_realtime",
-                            "current_price": stock_data.iloc[0].get('最新价', 0),
-                            "volume": stock_data.iloc[0].get('成交量', 0),
-                            "turnover": stock_data.iloc[0].get('成交额', 0),
-                            "quality": "high"
-                        })
-            except:
-                pass
-            
-            # 2. 尝试历史数据最新记录
-            try:
-                recent_trading_day = datetime.strptime(get_recent_trading_day(), "%Y-%m-%d")
-                current_date = recent_trading_day.strftime("%Y%m%d")
-                start_date = (recent_trading_day - timedelta(days=7)).strftime("%Y%m%d")  # 7天前
-                
-                hist_data = ak.stock_zh_a_hist(symbol=clean_code, period="daily", 
-                                             start_date=start_date, end_date=current_date, adjust="")
-                if hist_data is not None and not hist_data.empty:
-                    latest = hist_data.iloc[-1]
-                    data_sources.append({
-                        "source": "historical_latest",
-                        "current_price": latest.get('收盘', 0),
-                        "volume": latest.get('成交量', 0),
-                        "turnover": latest.get('成交额', 0),
-                        "date": latest.get('日期', ''),
-                        "quality": "medium"
-                    })
-            except:
-                pass
-            
-            # 3. 尝试获取资金流向数据
-            try:
-                money_flow = ak.stock_individual_fund_flow(stock=clean_code, market="sh" if clean_code.startswith('6') else "sz")
-                if money_flow is not None and not money_flow.empty:
-                    latest_flow = money_flow.iloc[-1]
-                    data_sources.append({
-                        "source": "money_flow",
-                        "main_inflow": latest_flow.get('主力净流入', 0),
-                        "retail_inflow": latest_flow.get('散户净流入', 0),
-                        "quality": "medium"
-                    })
-            except:
-                pass
-            
-            return {
-                "stock_code": stock_code,
-                "data_sources": data_sources,
-                "source_count": len(data_sources),
-                "best_source": data_sources[0] if data_sources else None
-            }
-            
-        except Exception as e:
-            logger.warning(f"获取替代数据源失败: {stock_code}, 错误: {str(e)}")
-            return None
-
     async def _analyze_chip_distribution(
         self, chip_data: Dict, stock_info: Dict, analysis_days: int
     ) -> Dict:
@@ -318,339 +531,187 @@ class ChipAnalysisTool(BaseTool):
             if not chip_data or not chip_data.get('chip_distribution'):
                 return {"error": "筹码数据不足，无法进行分析"}
             
-            df = pd.DataFrame(chip_data['chip_distribution'])
-            current_price = stock_info.get('current_price', 0)
-            
-            # 基础筹码分析
-            basic_analysis = self._basic_chip_analysis(df, current_price)
-            
-            # 主力成本分析
-            main_cost_analysis = self._main_cost_analysis(df, current_price)
-            
-            # 套牢区分析
-            trapped_analysis = self._trapped_area_analysis(df, current_price)
-            
-            # 筹码集中度分析
-            concentration_analysis = self._concentration_analysis(df)
-            
-            # 筹码变化趋势分析
-            trend_analysis = self._trend_analysis(df, analysis_days)
+            current_price = stock_info.get('current_price') or 0
             
-            # A股特色分析
-            special_analysis = self._a_stock_special_analysis(df, current_price)
-            
-            # 交易决策建议
-            trading_signals = self._generate_trading_signals(
-                basic_analysis, main_cost_analysis, trapped_analysis, concentration_analysis
+            # 各项子分析均为CPU计算，整体放到一个工作线程中执行，避免阻塞事件循环
+            return await asyncio.to_thread(
+                self._run_chip_analyses, chip_data['chip_distribution'], current_price, analysis_days
             )
             
-            return {
-                "basic_analysis": basic_analysis,
-                "main_cost_analysis": main_cost_analysis,
-                "trapped_analysis": trapped_analysis,
-                "concentration_analysis": concentration_analysis,
-                "trend_analysis": trend_analysis,
-                "special_analysis": special_analysis,
-                "trading_signals": trading_signals,
-            }
-            
         except Exception as e:
-            logger.error(f"筹码分析失败: {str(e)}")
+            logger.error("筹码分析失败: {}", e)
             return {"error": f"筹码分析失败: {str(e)}"}
 
-    def _basic_chip_analysis(self, df: pd.DataFrame, current_price: float) -> Dict:
+    def _run_chip_analyses(
+        self, chip_distribution: Dict[str, List], current_price: float, analysis_days: int
+    ) -> Dict:
+        """依次执行各项筹码子分析并汇总交易信号，相同输入复用缓存的中间指标"""
+        # 数据量很小，一次性转换为NumPy数组，各子分析直接按列访问
+        cols = _to_chip_columns(chip_distribution)
+        
+        cache_key = (
+            tuple((col, values.tobytes()) for col, values in cols.items()),
+            current_price,
+            analysis_days,
+        )
+        with _analysis_cache_lock:
+            features = _analysis_cache.get(cache_key)
+            if features is not None:
+                _analysis_cache.move_to_end(cache_key)
+        
+        if features is None:
+            features = self._compute_chip_features(cols, current_price, analysis_days)
+            with _analysis_cache_lock:
+                _analysis_cache[cache_key] = features
+                if len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+                    _analysis_cache.popitem(last=False)
+        
+        return self._build_chip_analyses(features, current_price, analysis_days)
+
+    def _compute_chip_features(
+        self, cols: Dict[str, np.ndarray], current_price: float, analysis_days: int
+    ) -> _ChipFeatures:
+        """基于列数组计算各子分析共用的指标与趋势标签，返回值只读，可直接缓存"""
+        # 各子分析用到的标量指标一次性算好并补齐缺失值，之后只读取汇总结果
+        summary = MappingProxyType(_summarize_chips(cols, current_price))
+        
+        # 趋势类分析的前置条件统一在此检查：数组缺失或不足两个数据点时为None，下游直接判定为数据不足
+        costs = cols.get('平均成本')
+        concentrations = cols.get('90%成本集中度')
+        if analysis_days > 0:
+            recent_costs = _trend_series(costs[-analysis_days:] if costs is not None else None)
+            recent_concentrations = _trend_series(
+                concentrations[-analysis_days:] if concentrations is not None else None
+            )
+        else:
+            recent_costs = recent_concentrations = None
+        concentrations = _trend_series(concentrations)
+        
+        # 集中度趋势，以及筹码迁移方向与稳定性
+        concentration_trend = self._analyze_concentration_trend(concentrations)
+        recent = self._analyze_recent(recent_costs, recent_concentrations)
+        return summary, concentration_trend, recent
+
+    def _build_chip_analyses(
+        self, features: _ChipFeatures, current_price: float, analysis_days: int
+    ) -> Dict:
+        """根据中间指标组装各项筹码子分析结果，每次调用返回新的字典"""
+        summary, concentration_trend, recent = features
+        
+        # 基础筹码分析
+        basic_analysis = self._basic_chip_analysis(summary, current_price)
+        
+        # 主力成本分析
+        main_cost_analysis = self._main_cost_analysis(summary, current_price)
+        
+        # 套牢区分析
+        trapped_analysis = self._trapped_area_analysis(summary)
+        
+        # 筹码集中度分析
+        concentration_analysis = self._concentration_analysis(summary, concentration_trend)
+        
+        # 筹码变化趋势分析
+        trend_analysis = self._trend_analysis(recent, analysis_days)
+        
+        # A股特色分析
+        special_analysis = self._a_stock_special_analysis()
+        
+        # 交易决策建议
+        trading_signals = self._generate_trading_signals(
+            basic_analysis, main_cost_analysis, trapped_analysis, concentration_analysis
+        )
+        
+        return {
+            "basic_analysis": basic_analysis,
+            "main_cost_analysis": main_cost_analysis,
+            "trapped_analysis": trapped_analysis,
+            "concentration_analysis": concentration_analysis,
+            "trend_analysis": trend_analysis,
+            "special_analysis": special_analysis,
+            "trading_signals": trading_signals,
+        }
+
+    def _basic_chip_analysis(self, summary: Dict[str, Any], current_price: float) -> Dict:
         """基础筹码分析"""
-        try:
-            if df is None or df.empty:
-                logger.warning("筹码分布数据为空，使用默认分析结果")
-                # 返回基于当前价格的估算结果
-                avg_cost = current_price * 0.95 if current_price > 0 else 10.0
-                return {
-                    "average_cost": avg_cost,
-                    "profit_ratio": 50.0,
-                    "concentration_90": 80.0,
-                    "concentration_70": 65.0,
-                    "current_price": current_price,
-                    "cost_deviation": (current_price - avg_cost) / avg_cost * 100 if avg_cost > 0 else 0,
-                    "data_quality": "estimated"
-                }
-            
-            # 尝试从不同的列名获取数据
-            avg_cost = 0
-            profit_ratio = 0
-            concentration_90 = 0
-            concentration_70 = 0
-            
-            # 处理不同的数据格式
-            if hasattr(df, 'columns'):
-                # DataFrame格式
-                if '平均成本' in df.columns:
-                    avg_cost = df['平均成本'].iloc[-1] if len(df) > 0 else 0
-                elif '价格' in df.columns and '筹码比例' in df.columns:
-                    # 计算加权平均成本
-                    total_chips = df['筹码比例'].sum()
-                    if total_chips > 0:
-                        avg_cost = (df['价格'] * df['筹码比例']).sum() / total_chips
-                
-                if '获利比例' in df.columns:
-                    profit_ratio = df['获利比例'].iloc[-1] if len(df) > 0 else 0
-                elif '价格' in df.columns and current_price > 0:
-                    # 估算获利比例
-                    profitable_volume = df[df['价格'] < current_price]['筹码比例'].sum() if '筹码比例' in df.columns else 0
-                    total_volume = df['筹码比例'].sum() if '筹码比例' in df.columns else 1
-                    profit_ratio = (profitable_volume / total_volume * 100) if total_volume > 0 else 50
-                
-                if '90%成本集中度' in df.columns:
-                    concentration_90 = df['90%成本集中度'].iloc[-1] if len(df) > 0 else 0
-                if '70%成本集中度' in df.columns:
-                    concentration_70 = df['70%成本集中度'].iloc[-1] if len(df) > 0 else 0
-            else:
-                # 字典格式
-                avg_cost = df.get('平均成本', 0)
-                profit_ratio = df.get('获利比例', 0)
-                concentration_90 = df.get('90%成本集中度', 0)
-                concentration_70 = df.get('70%成本集中度', 0)
-            
-            # 如果没有获取到有效数据，使用估算值
-            if avg_cost == 0:
-                avg_cost = current_price * 0.95 if current_price > 0 else 10.0
-            if profit_ratio == 0:
-                profit_ratio = 50.0
-            if concentration_90 == 0:
-                concentration_90 = 80.0
-            if concentration_70 == 0:
-                concentration_70 = 65.0
-            
-            return {
-                "average_cost": round(avg_cost, 2),
-                "profit_ratio": round(profit_ratio, 2),
-                "concentration_90": round(concentration_90, 2),
-                "concentration_70": round(concentration_70, 2),
-                "current_price": current_price,
-                "cost_deviation": round((current_price - avg_cost) / avg_cost * 100, 2) if avg_cost > 0 else 0,
-                "data_quality": "processed"
-            }
-            
-        except Exception as e:
-            logger.error(f"基础筹码分析失败: {str(e)}")
-            # 返回默认值而不是错误
-            avg_cost = current_price * 0.95 if current_price > 0 else 10.0
-            return {
-                "average_cost": avg_cost,
-                "profit_ratio": 50.0,
-                "concentration_90": 80.0,
-                "concentration_70": 65.0,
-                "current_price": current_price,
-                "cost_deviation": round((current_price - avg_cost) / avg_cost * 100, 2) if avg_cost > 0 else 0,
-                "error": str(e),
-                "data_quality": "error_fallback"
-            }
-
-    def _main_cost_analysis(self, df: pd.DataFrame, current_price: float) -> Dict:
+        avg_cost = summary["average_cost"]
+        return {
+            "average_cost": round(avg_cost, 2),
+            "profit_ratio": round(summary["profit_ratio"], 2),
+            "concentration_90": round(summary["concentration_90"], 2),
+            "concentration_70": round(summary["concentration_70"], 2),
+            "current_price": current_price,
+            "cost_deviation": round((current_price - avg_cost) / avg_cost * 100, 2) if avg_cost > 0 else 0,
+            "data_quality": summary["data_quality"],
+        }
+
+    def _main_cost_analysis(self, summary: Dict[str, Any], current_price: float) -> Dict:
         """主力成本分析"""
-        try:
-            if df is None or df.empty:
-                logger.warning("筹码分布数据为空，使用默认主力成本分析")
-                avg_cost = current_price * 0.95 if current_price > 0 else 10.0
-                main_cost_deviation = (current_price - avg_cost) / avg_cost * 100 if avg_cost > 0 else 0
-                control_level = self._evaluate_control_level(80.0)
-                return {
-                    "main_cost_area": avg_cost,
-                    "cost_deviation_percent": round(main_cost_deviation, 2),
-                    "control_level": control_level,
-                    "main_profit_space": max(main_cost_deviation, 0) if main_cost_deviation > 0 else 0,
-                    "analysis": self._generate_main_cost_analysis_text(main_cost_deviation, control_level),
-                    "data_quality": "estimated"
-                }
-            
-            # 获取平均成本
-            avg_cost = 0
-            concentration_90 = 0
-            
-            if hasattr(df, 'columns'):
-                # DataFrame格式
-                if '平均成本' in df.columns:
-                    avg_cost = df['平均成本'].iloc[-1] if len(df) > 0 else 0
-                elif '价格' in df.columns and '筹码比例' in df.columns:
-                    # 计算加权平均成本
-                    total_chips = df['筹码比例'].sum()
-                    if total_chips > 0:
-                        avg_cost = (df['价格'] * df['筹码比例']).sum() / total_chips
-                
-                if '90%成本集中度' in df.columns:
-                    concentration_90 = df['90%成本集中度'].iloc[-1] if len(df) > 0 else 0
-            else:
-                # 字典格式
-                avg_cost = df.get('平均成本', 0)
-                concentration_90 = df.get('90%成本集中度', 0)
-            
-            # 如果没有获取到有效数据，使用估算值
-            if avg_cost == 0:
-                avg_cost = current_price * 0.95 if current_price > 0 else 10.0
-            if concentration_90 == 0:
-                concentration_90 = 80.0
-            
-            # 主力成本乖离率
-            main_cost_deviation = (current_price - avg_cost) / avg_cost * 100 if avg_cost > 0 else 0
-            
-            # 主力控盘程度评估
-            control_level = self._evaluate_control_level(concentration_90)
-            
-            return {
-                "main_cost_area": round(avg_cost, 2),
-                "cost_deviation_percent": round(main_cost_deviation, 2),
-                "control_level": control_level,
-                "main_profit_space": round(max(main_cost_deviation, 0), 2),
-                "analysis": self._generate_main_cost_analysis_text(main_cost_deviation, control_level),
-                "data_quality": "processed"
-            }
-            
-        except Exception as e:
-            logger.error(f"主力成本分析失败: {str(e)}")
-            # 返回默认值而不是错误
-            avg_cost = current_price * 0.95 if current_price > 0 else 10.0
-            main_cost_deviation = (current_price - avg_cost) / avg_cost * 100 if avg_cost > 0 else 0
-            control_level = self._evaluate_control_level(80.0)
-            return {
-                "main_cost_area": avg_cost,
-                "cost_deviation_percent": round(main_cost_deviation, 2),
-                "control_level": control_level,
-                "main_profit_space": max(main_cost_deviation, 0),
-                "analysis": self._generate_main_cost_analysis_text(main_cost_deviation, control_level),
-                "error": str(e),
-                "data_quality": "error_fallback"
-            }
-
-    def _trapped_area_analysis(self, df: pd.DataFrame, current_price: float) -> Dict:
+        avg_cost = summary["average_cost"]
+        
+        # 主力成本乖离率
+        main_cost_deviation = (current_price - avg_cost) / avg_cost * 100 if avg_cost > 0 else 0
+        
+        # 主力控盘程度评估
+        control_level = self._evaluate_control_level(summary["concentration_90"])
+        
+        return {
+            "main_cost_area": round(avg_cost, 2),
+            "cost_deviation_percent": round(main_cost_deviation, 2),
+            "control_level": control_level,
+            "main_profit_space": round(max(main_cost_deviation, 0), 2),
+            "analysis": self._generate_main_cost_analysis_text(main_cost_deviation, control_level),
+            "data_quality": summary["data_quality"],
+        }
+
+    def _trapped_area_analysis(self, summary: Dict[str, Any]) -> Dict:
         """套牢区分析"""
-        try:
-            if df is None or df.empty:
-                logger.warning("筹码分布数据为空，使用默认套牢区分析")
-                trapped_ratio = 50.0
-                trapped_depth = self._evaluate_trapped_depth(trapped_ratio)
-                return {
-                    "trapped_ratio": trapped_ratio,
-                    "trapped_depth": trapped_depth,
-                    "selling_pressure": self._evaluate_selling_pressure(trapped_ratio),
-                    "analysis": self._generate_trapped_analysis_text(trapped_ratio, trapped_depth),
-                    "data_quality": "estimated"
-                }
-            
-            # 获取获利比例
-            profit_ratio = 0
-            
-            if hasattr(df, 'columns'):
-                # DataFrame格式
-                if '获利比例' in df.columns:
-                    profit_ratio = df['获利比例'].iloc[-1] if len(df) > 0 else 0
-                elif '价格' in df.columns and '筹码比例' in df.columns and current_price > 0:
-                    # 计算获利比例
-                    profitable_volume = df[df['价格'] < current_price]['筹码比例'].sum()
-                    total_volume = df['筹码比例'].sum()
-                    profit_ratio = (profitable_volume / total_volume * 100) if total_volume > 0 else 0
-            else:
-                # 字典格式
-                profit_ratio = df.get('获利比例', 0)
-            
-            # 如果没有获取到有效数据，使用估算值
-            if profit_ratio == 0:
-                profit_ratio = 50.0
-            
-            # 套牢比例
-            trapped_ratio = 100 - profit_ratio
-            
-            # 套牢深度评估
-            trapped_depth = self._evaluate_trapped_depth(trapped_ratio)
-            
-            return {
-                "trapped_ratio": round(trapped_ratio, 2),
-                "trapped_depth": trapped_depth,
-                "selling_pressure": self._evaluate_selling_pressure(trapped_ratio),
-                "analysis": self._generate_trapped_analysis_text(trapped_ratio, trapped_depth),
-                "data_quality": "processed"
-            }
-            
-        except Exception as e:
-            logger.error(f"套牢区分析失败: {str(e)}")
-            # 返回默认值而不是错误
-            trapped_ratio = 50.0
-            trapped_depth = self._evaluate_trapped_depth(trapped_ratio)
-            return {
-                "trapped_ratio": trapped_ratio,
-                "trapped_depth": trapped_depth,
-                "selling_pressure": self._evaluate_selling_pressure(trapped_ratio),
-                "analysis": self._generate_trapped_analysis_text(trapped_ratio, trapped_depth),
-                "error": str(e),
-                "data_quality": "error_fallback"
-            }
-
-    def _concentration_analysis(self, df: pd.DataFrame) -> Dict:
+        # 套牢比例
+        trapped_ratio = 100 - summary["profit_ratio"]
+        
+        # 套牢深度评估
+        trapped_depth = self._evaluate_trapped_depth(trapped_ratio)
+        
+        return {
+            "trapped_ratio": round(trapped_ratio, 2),
+            "trapped_depth": trapped_depth,
+            "selling_pressure": self._evaluate_selling_pressure(trapped_ratio),
+            "analysis": self._generate_trapped_analysis_text(trapped_ratio, trapped_depth),
+            "data_quality": summary["data_quality"],
+        }
+
+    def _concentration_analysis(self, summary: Dict[str, Any], concentration_trend: str) -> Dict:
         """筹码集中度分析"""
-        try:
-            concentration_90 = df.get('90%成本集中度', [0])[-1] if '90%成本集中度' in df.columns else 0
-            concentration_70 = df.get('70%成本集中度', [0])[-1] if '70%成本集中度' in df.columns else 0
-            
-            # 集中度变化趋势
-            concentration_trend = self._analyze_concentration_trend(df)
-            
-            return {
-                "concentration_90": concentration_90,
-                "concentration_70": concentration_70,
-                "concentration_level": self._evaluate_concentration_level(concentration_90),
-                "trend": concentration_trend,
-                "analysis": self._generate_concentration_analysis_text(concentration_90, concentration_70),
-            }
-            
-        except Exception as e:
-            logger.error(f"筹码集中度分析失败: {str(e)}")
-            return {"error": str(e)}
-
-    def _trend_analysis(self, df: pd.DataFrame, analysis_days: int) -> Dict:
-        """筹码变化趋势分析"""
-        try:
-            # 获取最近几天的数据
-            recent_data = df.tail(min(analysis_days, len(df)))
-            
-            # 筹码迁移分析
-            chip_migration = self._analyze_chip_migration(recent_data)
-            
-            # 筹码稳定性分析
-            stability = self._analyze_chip_stability(recent_data)
-            
-            return {
-                "analysis_period": analysis_days,
-                "chip_migration": chip_migration,
-                "stability": stability,
-                "trend_direction": self._determine_trend_direction(chip_migration),
-                "analysis": self._generate_trend_analysis_text(chip_migration, stability),
-            }
-            
-        except Exception as e:
-            logger.error(f"筹码趋势分析失败: {str(e)}")
-            return {"error": str(e)}
-
-    def _a_stock_special_analysis(self, df: pd.DataFrame, current_price: float) -> Dict:
-        """A股特色分析"""
-        try:
-            # 政策市特征分析
-            policy_impact = self._analyze_policy_impact(df)
-            
-            # 游资操作模式识别
-            hot_money_pattern = self._identify_hot_money_pattern(df, current_price)
-            
-            # 机构调仓轨迹
-            institutional_adjustment = self._analyze_institutional_adjustment(df)
-            
-            return {
-                "policy_impact": policy_impact,
-                "hot_money_pattern": hot_money_pattern,
-                "institutional_adjustment": institutional_adjustment,
-                "a_stock_characteristics": self._generate_a_stock_characteristics_text(),
-            }
-            
-        except Exception as e:
-            logger.error(f"A股特色分析失败: {str(e)}")
-            return {"error": str(e)}
+        concentration_90 = summary['raw_concentration_90']
+        concentration_70 = summary['raw_concentration_70']
+        
+        return {
+            "concentration_90": concentration_90,
+            "concentration_70": concentration_70,
+            "concentration_level": self._evaluate_concentration_level(concentration_90),
+            "trend": concentration_trend,
+            "analysis": self._generate_concentration_analysis_text(concentration_90, concentration_70),
+        }
+
+    def _trend_analysis(self, recent: Tuple[int, str, str], analysis_days: int) -> Dict:
+        """筹码变化趋势分析，recent为最近analysis_days天的(迁移方向代码, 筹码迁移, 稳定性)"""
+        migration_code, chip_migration, stability = recent
+        
+        return {
+            "analysis_period": analysis_days,
+            "chip_migration": chip_migration,
+            "stability": stability,
+            "trend_direction": self._determine_trend_direction(migration_code),
+            "analysis": self._generate_trend_analysis_text(chip_migration, stability),
+        }
+
+    def _a_stock_special_analysis(self) -> Dict:
+        """A股特色分析（政策影响、游资模式、机构调仓暂需结合外部数据，返回固定说明）"""
+        return {
+            "policy_impact": _POLICY_IMPACT_TEXT,
+            "hot_money_pattern": _HOT_MONEY_PATTERN_TEXT,
+            "institutional_adjustment": _INSTITUTIONAL_ADJUSTMENT_TEXT,
+            "a_stock_characteristics": _A_STOCK_CHARACTERISTICS_TEXT,
+        }
 
     def _generate_trading_signals(
         self, basic: Dict, main_cost: Dict, trapped: Dict, concentration: Dict
@@ -688,139 +749,85 @@ class ChipAnalysisTool(BaseTool):
             return signals
             
         except Exception as e:
-            logger.error(f"交易信号生成失败: {str(e)}")
+            logger.error("交易信号生成失败: {}", e)
             return {"error": str(e)}
 
     # 辅助方法
     def _evaluate_control_level(self, concentration: float) -> str:
         """评估控盘程度"""
-        if concentration < 10:
-            return "低度控盘"
-        elif concentration < 20:
-            return "中度控盘"
-        elif concentration < 30:
-            return "高度控盘"
-        else:
-            return "极度控盘"
+        return _CONTROL_LEVEL_LABELS[bisect_right(_CONTROL_LEVEL_THRESHOLDS, concentration)]
 
     def _evaluate_trapped_depth(self, trapped_ratio: float) -> str:
         """评估套牢深度"""
-        if trapped_ratio < 20:
-            return "轻度套牢"
-        elif trapped_ratio < 40:
-            return "中度套牢"
-        elif trapped_ratio < 60:
-            return "重度套牢"
-        else:
-            return "深度套牢"
+        return _TRAPPED_DEPTH_LABELS[bisect_right(_TRAPPED_DEPTH_THRESHOLDS, trapped_ratio)]
 
     def _evaluate_selling_pressure(self, trapped_ratio: float) -> str:
         """评估抛售压力"""
-        if trapped_ratio < 30:
-            return "抛压较小"
-        elif trapped_ratio < 60:
-            return "抛压中等"
-        else:
-            return "抛压较大"
+        return _SELLING_PRESSURE_LABELS[bisect_right(_SELLING_PRESSURE_THRESHOLDS, trapped_ratio)]
 
     def _evaluate_concentration_level(self, concentration: float) -> str:
         """评估集中度水平"""
-        if concentration < 15:
-            return "高度集中"
-        elif concentration < 25:
-            return "中度集中"
-        elif concentration < 35:
-            return "较为分散"
-        else:
-            return "高度分散"
+        return _CONCENTRATION_LEVEL_LABELS[bisect_right(_CONCENTRATION_LEVEL_THRESHOLDS, concentration)]
 
-    def _analyze_concentration_trend(self, df: pd.DataFrame) -> str:
+    def _analyze_concentration_trend(self, concentrations: Optional[np.ndarray]) -> str:
         """分析集中度变化趋势"""
-        try:
-            if '90%成本集中度' in df.columns and len(df) > 1:
-                recent_concentration = df['90%成本集中度'].tail(5).mean()
-                earlier_concentration = df['90%成本集中度'].head(5).mean()
-                
-                if recent_concentration > earlier_concentration:
-                    return "集中度上升"
-                elif recent_concentration < earlier_concentration:
-                    return "集中度下降"
-                else:
-                    return "集中度稳定"
-            else:
-                return "数据不足"
-        except:
-            return "分析失败"
-
-    def _analyze_chip_migration(self, recent_data: pd.DataFrame) -> str:
-        """分析筹码迁移"""
-        try:
-            if '平均成本' in recent_data.columns and len(recent_data) > 1:
-                cost_change = recent_data['平均成本'].iloc[-1] - recent_data['平均成本'].iloc[0]
-                if cost_change > 0:
-                    return "筹码向上迁移"
-                elif cost_change < 0:
-                    return "筹码向下迁移"
-                else:
-                    return "筹码稳定"
-            else:
-                return "数据不足"
-        except:
-            return "分析失败"
-
-    def _analyze_chip_stability(self, recent_data: pd.DataFrame) -> str:
-        """分析筹码稳定性"""
-        try:
-            if '90%成本集中度' in recent_data.columns and len(recent_data) > 1:
-                concentration_std = recent_data['90%成本集中度'].std()
-                if concentration_std < 2:
-                    return "筹码稳定"
-                elif concentration_std < 5:
-                    return "筹码轻微波动"
-                else:
-                    return "筹码大幅波动"
-            else:
-                return "数据不足"
-        except:
-            return "分析失败"
-
-    def _determine_trend_direction(self, chip_migration: str) -> str:
-        """确定趋势方向"""
-        if "向上" in chip_migration:
-            return "上升趋势"
-        elif "向下" in chip_migration:
-            return "下降趋势"
+        if concentrations is None:
+            return "数据不足"
+        
+        recent_concentration = concentrations[-5:].mean()
+        earlier_concentration = concentrations[:5].mean()
+        if recent_concentration > earlier_concentration:
+            return "集中度上升"
+        elif recent_concentration < earlier_concentration:
+            return "集中度下降"
         else:
-            return "震荡趋势"
-
-    def _analyze_policy_impact(self, df: pd.DataFrame) -> str:
-        """分析政策影响"""
-        return "需要结合具体政策事件分析"
-
-    def _identify_hot_money_pattern(self, df: pd.DataFrame, current_price: float) -> str:
-        """识别游资操作模式"""
-        return "需要结合成交量和价格走势分析"
-
-    def _analyze_institutional_adjustment(self, df: pd.DataFrame) -> str:
-        """分析机构调仓"""
-        return "需要结合机构持仓数据分析"
+            return "集中度稳定"
+
+    def _analyze_recent(
+        self, costs: Optional[np.ndarray], concentrations: Optional[np.ndarray]
+    ) -> Tuple[int, str, str]:
+        """分析最近数据的筹码迁移与稳定性，返回(迁移方向代码, 筹码迁移, 筹码稳定性)"""
+        migration_code, chip_migration = self._analyze_chip_migration(costs)
+        return migration_code, chip_migration, self._analyze_chip_stability(concentrations)
+
+    def _analyze_chip_migration(self, costs: Optional[np.ndarray]) -> Tuple[int, str]:
+        """分析筹码迁移，返回(迁移方向代码, 描述)"""
+        if costs is None:
+            return _MIGRATION_FLAT, "数据不足"
+        
+        cost_change = costs[-1] - costs[0]
+        if cost_change > 0:
+            return _MIGRATION_UP, "筹码向上迁移"
+        elif cost_change < 0:
+            return _MIGRATION_DOWN, "筹码向下迁移"
+        else:
+            return _MIGRATION_FLAT, "筹码稳定"
 
-    def _generate_a_stock_characteristics_text(self) -> str:
-        """生成A股特色分析文本"""
-        return "A股市场具有政策市、资金市特征，需要密切关注政策变化和资金流向"
+    def _analyze_chip_stability(self, concentrations: Optional[np.ndarray]) -> str:
+        """分析筹码稳定性"""
+        if concentrations is None:
+            return "数据不足"
+        
+        # 与pandas的Series.std保持一致，使用样本标准差
+        concentration_std = concentrations.std(ddof=1)
+        return _STABILITY_LABELS[bisect_right(_STABILITY_THRESHOLDS, concentration_std)]
+
+    def _determine_trend_direction(self, migration_code: int) -> str:
+        """确定趋势方向"""
+        return _TREND_DIRECTION_LABELS[migration_code]
 
     def _generate_main_cost_analysis_text(self, deviation: float, control_level: str) -> str:
         """生成主力成本分析文本"""
-        return f"主力成本乖离率{deviation:.2f}%，控盘程度：{control_level}"
+        return _MAIN_COST_TEXT_TPL % (deviation, control_level)
 
     def _generate_trapped_analysis_text(self, trapped_ratio: float, trapped_depth: str) -> str:
         """生成套牢分析文本"""
-        return f"套牢比例{trapped_ratio:.2f}%，套牢深度：{trapped_depth}"
+        return _TRAPPED_TEXT_TPL % (trapped_ratio, trapped_depth)
 
     def _generate_concentration_analysis_text(self, concentration_90: float, concentration_70: float) -> str:
         """生成集中度分析文本"""
-        return f"90%集中度{concentration_90:.2f}%，70%集中度{concentration_70:.2f}%"
+        return _CONCENTRATION_TEXT_TPL % (concentration_90, concentration_70)
 
     def _generate_trend_analysis_text(self, chip_migration: str, stability: str) -> str:
         """生成趋势分析文本"""
-        return f"筹码迁移：{chip_migration}，筹码稳定性：{stability}" 
\ No newline at end of file
+        return _TREND_TEXT_TPL % (chip_migration, stability) 
\ No newline at end of file
@@ -3,12 +3,16 @@ HTML generation tool - Uses LLM to generate complete web pages
 based on user requirements including styling and JavaScript interactions.
 """
 
+import asyncio
+import contextlib
+import hashlib
 import json
 import os
 import re
 import sys
-from datetime import datetime
-from typing import Any, Dict, Optional
+import time
+import uuid
+from typing import Any, Dict, List, Optional
 
 from pydantic import Field
 
@@ -23,173 +27,137 @@ if project_root not in sys.path:
 
 from src.llm import LLM
 from src.tool.base import BaseTool, ToolResult
+from src.utils.data_cache import get_cache_manager
+from src.utils.json_utils import json_default
 from src.utils.report_manager import report_manager
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps_json(
+    data: Any, sort_keys: bool = False, compact: bool = False, ensure_ascii: bool = True
+) -> str:
+    """Serialize data as 2-space indented JSON (or without whitespace when compact),
+    using orjson when it is installed.
+
+    orjson always writes non-ASCII characters as UTF-8; the stdlib fallback escapes
+    them unless ensure_ascii is False.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, default=str, option=option).decode()
+    if compact:
+        return json.dumps(
+            data, ensure_ascii=ensure_ascii, separators=(',', ':'),
+            sort_keys=sort_keys, default=json_default,
+        )
+    return json.dumps(
+        data, ensure_ascii=ensure_ascii, indent=2, separators=(',', ': '),
+        sort_keys=sort_keys, default=json_default,
+    )
+
+
+# Precompiled patterns used when post-processing generated HTML
+# Both declaration kinds in one alternation, so the document is scanned once;
+# the named group that matched tells which kind was found
+_DATA_DECL_RE = re.compile(
+    r'(?P<report>\b(?:let|const|var)\s+reportData\s*=)|(?P<window>window\.(?:pageData|reportData)\s*=)',
+    re.IGNORECASE,
+)
+# (pattern, replacement template); {data} is filled with the serialized data after group expansion
+_REPLACEMENT_RES = (
+    # 匹配 const/let/var reportData = { ... }; 格式
+    (re.compile(r'(\b(?:const|let|var)\s+reportData\s*=\s*)\{[\s\S]*?\}(\s*;?)', re.DOTALL | re.IGNORECASE), '\\1{data}\\2'),
+    # 匹配 window.pageData = { ... }; 格式
+    (re.compile(r'(window\.(?:pageData|reportData)\s*=\s*)\{[\s\S]*?\}(\s*;?)', re.DOTALL | re.IGNORECASE), '\\1{data}\\2'),
+    # 匹配注释格式的占位符
+    (re.compile(r'(\b(?:const|let|var)\s+reportData\s*=\s*)\{\}(\s*;?\s*//[^\n]*)', re.DOTALL | re.IGNORECASE), '\\1{data}\\2'),
+)
+_INJECTION_RES = (
+    # 空对象占位符
+    (re.compile(r'\b(const|let|var)\s+reportData\s*=\s*\{\}\s*;', re.IGNORECASE), '\\1 reportData = {data};'),
+    (re.compile(r'window\.(pageData|reportData)\s*=\s*\{\}\s*;', re.IGNORECASE), 'window.\\1 = {data};'),
+    # 带注释的占位符
+    (re.compile(r'(\b(?:const|let|var)\s+reportData\s*=\s*)\{\}(\s*;?\s*//[^\n]*)', re.IGNORECASE), '\\1{data}\\2'),
+    # 模板中的特殊注释
+    (re.compile(r'//\s*页面数据注入点[^\n]*\n', re.IGNORECASE), '// 页面数据注入点\n        const reportData = {data};\n'),
+)
+_SCRIPT_TAG_RES = (
+    re.compile(r'<script[^>]*>\s*', re.IGNORECASE),  # 任何script标签开始
+    re.compile(r'<script>\s*', re.IGNORECASE),       # 简单script标签
+)
+_REPORTDATA_BLOCK_RE = re.compile(r'\b(const|let|var)\s+reportData\s*=\s*\{[\s\S]*?\}\s*;?', re.IGNORECASE)
+_WINDOW_DATA_BLOCK_RE = re.compile(r'window\.(pageData|reportData)\s*=\s*\{[\s\S]*?\}\s*;?', re.IGNORECASE)
+_CHARSET_META_RE = re.compile(r'<meta\s+charset\s*=\s*["\']?([^"\'>\s]+)["\']?[^>]*>', re.IGNORECASE)
+_HEAD_TAG_RE = re.compile(r'(<head[^>]*>)', re.IGNORECASE)
+_HEAD_CLOSE_RE = re.compile(r'</head\s*>', re.IGNORECASE)
+_DOCTYPE_RE = re.compile(r'<!DOCTYPE\s+html', re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r'<html[^>]*>', re.IGNORECASE)
+_BODY_TAG_RE = re.compile(r'<body[^>]*>', re.IGNORECASE)
+_CHARSET_RE = re.compile(r'<meta\s+charset', re.IGNORECASE)
+
+# The system message and the template part of the user prompt are identical for every
+# request; keeping them at the front lets backends with automatic prefix caching reuse them
+_HTML_SYSTEM_MESSAGE = {"role": "system", "content": CREATE_HTML_TOOL_PROMPT}
+_HTML_PROMPT_PREFIX = f"""请根据以下需求和HTML模板生成一个完整的HTML页面：
+
+# HTML模板
+{CREATE_HTML_TEMPLATE_PROMPT}
+
+# 重要要求
+请确保在HTML页面的footer区域包含AI生成报告的免责声明，说明本报告由人工智能系统自动生成，仅供参考，不构成投资建议。
 """
-数据缓存与实时更新策略
-"""
-import json
-import time
-import os
-from typing import Dict, Optional, Any
-from datetime import datetime, timedelta
 
-class DataCacheManager:
-    """数据缓存管理器"""
-    
-    def __init__(self, cache_dir: str = "cache"):
-        self.cache_dir = cache_dir
-        self.ensure_cache_dir()
-        
-        # 缓存配置
-        self.cache_config = {
-            "chip_analysis": {"ttl": 300, "max_age": 900},      # 5分钟TTL，15分钟最大age
-            "stock_info": {"ttl": 60, "max_age": 180},           # 1分钟TTL，3分钟最大age
-            "sentiment_data": {"ttl": 600, "max_age": 1800},     # 10分钟TTL，30分钟最大age
-            "technical_analysis": {"ttl": 180, "max_age": 600},  # 3分钟TTL，10分钟最大age
-            "risk_control": {"ttl": 120, "max_age": 360},        # 2分钟TTL，6分钟最大age
-        }
-    
-    def ensure_cache_dir(self):
-        """确保缓存目录存在"""
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
-    
-    def get_cache_key(self, data_type: str, stock_code: str, **kwargs) -> str:
-        """生成缓存键"""
-        params = "_".join([f"{k}={v}" for k, v in sorted(kwargs.items())])
-        return f"{data_type}_{stock_code}_{params}" if params else f"{data_type}_{stock_code}"
-    
-    def get_cache_file(self, cache_key: str) -> str:
-        """获取缓存文件路径"""
-        return os.path.join(self.cache_dir, f"{cache_key}.json")
-    
-    def get_cached_data(self, data_type: str, stock_code: str, **kwargs) -> Optional[Dict]:
-        """获取缓存数据"""
-        try:
-            cache_key = self.get_cache_key(data_type, stock_code, **kwargs)
-            cache_file = self.get_cache_file(cache_key)
-            
-            if not os.path.exists(cache_file):
-                return None
-            
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
-            
-            # 检查缓存是否过期
-            cache_time = cached_data.get('cache_time', 0)
-            current_time = time.time()
-            
-            config = self.cache_config.get(data_type, {"ttl": 300, "max_age": 900})
-            
-            # 硬过期检查
-            if current_time - cache_time > config['max_age']:
-                self.remove_cache(cache_key)
-                return None
-            
-            # 软过期检查 - 返回但标记为过期
-            if current_time - cache_time > config['ttl']:
-                cached_data['is_stale'] = True
-            else:
-                cached_data['is_stale'] = False
-            
-            return cached_data
-            
-        except Exception as e:
-            print(f"获取缓存数据失败: {str(e)}")
-            return None
-    
-    def set_cached_data(self, data_type: str, stock_code: str, data: Any, **kwargs):
-        """设置缓存数据"""
-        try:
-            cache_key = self.get_cache_key(data_type, stock_code, **kwargs)
-            cache_file = self.get_cache_file(cache_key)
-            
-            cache_data = {
-                "cache_time": time.time(),
-                "data_type": data_type,
-                "stock_code": stock_code,
-                "data": data,
-                "metadata": kwargs
-            }
-            
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-                
-        except Exception as e:
-            print(f"设置缓存数据失败: {str(e)}")
-    
-    def remove_cache(self, cache_key: str):
-        """删除缓存"""
-        try:
-            cache_file = self.get_cache_file(cache_key)
-            if os.path.exists(cache_file):
-                os.remove(cache_file)
-        except Exception as e:
-            print(f"删除缓存失败: {str(e)}")
-    
-    def cleanup_expired_cache(self):
-        """清理过期缓存"""
-        try:
-            current_time = time.time()
-            
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.cache_dir, filename)
-                    
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            cached_data = json.load(f)
-                        
-                        cache_time = cached_data.get('cache_time', 0)
-                        data_type = cached_data.get('data_type', 'unknown')
-                        
-                        config = self.cache_config.get(data_type, {"ttl": 300, "max_age": 900})
-                        
-                        if current_time - cache_time > config['max_age']:
-                            os.remove(file_path)
-                            
-                    except Exception:
-                        # 如果文件损坏，删除它
-                        os.remove(file_path)
-                        
-        except Exception as e:
-            print(f"清理过期缓存失败: {str(e)}")
+# The template declares its data as this literal, so injection is a single str.replace
+_DATA_PLACEHOLDER = "__REPORT_DATA_PLACEHOLDER__"
 
-# 全局缓存管理器实例
-cache_manager = DataCacheManager()
+# Strings longer than this are truncated before being injected into the page
+_MAX_JS_STRING_LENGTH = 20000
 
-def with_cache(data_type: str):
-    """缓存装饰器"""
-    def decorator(func):
-        async def wrapper(self, stock_code: str, **kwargs):
-            # 尝试从缓存获取数据
-            cached_data = cache_manager.get_cached_data(data_type, stock_code, **kwargs)
-            
-            if cached_data and not cached_data.get('is_stale', False):
-                print(f"使用缓存数据: {data_type}_{stock_code}")
-                return cached_data['data']
-            
-            # 执行原始函数
-            try:
-                result = await func(self, stock_code, **kwargs)
-                
-                # 缓存结果
-                if result:
-                    cache_manager.set_cached_data(data_type, stock_code, result, **kwargs)
-                
-                return result
-                
-            except Exception as e:
-                # 如果有过期但可用的缓存，返回缓存数据
-                if cached_data and cached_data.get('is_stale', False):
-                    print(f"使用过期缓存数据作为fallback: {data_type}_{stock_code}")
-                    return cached_data['data']
-                
-                raise e
-        
-        return wrapper
-    return decorator
+
+def _html_cache_key(llm: Any, messages: List[Dict[str, Any]]) -> Optional[str]:
+    """SHA-256 of the model and prompt messages, or None when sampling is not deterministic
+
+    Only temperature 0 (as in config.example.toml) enables the page cache; the
+    LLMSettings default of 1.0 leaves it off.
+    """
+    if getattr(llm, "temperature", 0) != 0:
+        return None
+    payload = json.dumps(
+        {"model": getattr(llm, "model", None), "messages": messages},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _write_file_bytes(filepath: str, content: bytes) -> None:
+    """Write bytes to filepath, creating the parent directory if needed
+
+    The content goes to a temporary sibling first and is renamed into place,
+    so readers never see a partially written file.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+    # Every call gets its own temporary name, so concurrent writers to the same path
+    # never share a file; "xb" refuses to reuse an existing one. Unlike tempfile's
+    # 0600 files, the page keeps the usual umask-based permissions.
+    tmp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, "xb", buffering=1 << 20) as f:
+            f.write(content)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        # Don't leave the partial temporary file behind
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
 
 
 class CreateHtmlTool(BaseTool):
@@ -239,24 +207,14 @@ class CreateHtmlTool(BaseTool):
         self, request: str, additional_context: Optional[Dict[str, Any]] = None
     ) -> str:
         """Generate a complete HTML page based on user request"""
-        logger.info(f"Starting HTML page generation: {request[:100]}...")
-
-        # Build the complete prompt
-        prompt = f"""请根据以下需求和HTML模板生成一个完整的HTML页面：
+        logger.info("Starting HTML page generation: {}...", request[:100])
 
-# 需求
-{request}
-
-# HTML模板
-{CREATE_HTML_TEMPLATE_PROMPT}
-
-# 重要要求
-请确保在HTML页面的footer区域包含AI生成报告的免责声明，说明本报告由人工智能系统自动生成，仅供参考，不构成投资建议。
-"""
+        # Build the complete prompt: the stable prefix first, then the per-request part
+        prompt = f"{_HTML_PROMPT_PREFIX}\n# 需求\n{request}\n"
         # Add additional context if provided
         if additional_context:
             if data := additional_context.get("data"):
-                prompt += f"\n\nData to display:\n{json.dumps(data, ensure_ascii=False, indent=2)}"
+                prompt += f"\n\nData to display:\n{_dumps_json(data, sort_keys=True, ensure_ascii=False)}"
 
             if reference := additional_context.get("reference"):
                 prompt += f"\n\nReference design or layout:\n{reference}"
@@ -266,16 +224,25 @@ class CreateHtmlTool(BaseTool):
 
         # Generate HTML using LLM
         messages = [
-            {"role": "system", "content": CREATE_HTML_TOOL_PROMPT},
+            _HTML_SYSTEM_MESSAGE,
             {"role": "user", "content": prompt},
         ]
 
+        # Identical prompts at temperature 0 reuse the page generated earlier
+        cache_key = _html_cache_key(self.llm, messages)
+        if cache_key is not None:
+            cache_manager = get_cache_manager()
+            cached = cache_manager.get_cached_data("html_generation", cache_key)
+            if cached and not cached.get("is_stale", False):
+                logger.info("Using cached HTML generation: {}", cache_key[:12])
+                return cached["data"]
+
         try:
             response = await self.llm.ask(messages=messages)
             html_code = self._extract_html_code(response)
-            logger.info(
-                f"HTML generation completed, length: {len(html_code)} characters"
-            )
+            logger.info("HTML generation completed, length: {} characters", len(html_code))
+            if cache_key is not None and html_code:
+                get_cache_manager().set_cached_data("html_generation", cache_key, html_code)
             return html_code
         except Exception as e:
             logger.error(f"Error generating HTML: {e}")
@@ -283,39 +250,29 @@ class CreateHtmlTool(BaseTool):
 
     def _extract_html_code(self, response: str) -> str:
         """Extract HTML code from LLM response with enhanced parsing"""
-        logger.info(f"Extracting HTML from response, length: {len(response)}")
+        logger.info("Extracting HTML from response, length: {}", len(response))
         
-        # Method 1: Check for HTML code block with various formats
-        html_block_patterns = [
-            r"```html\s*\n(.*?)\n```",
-            r"```HTML\s*\n(.*?)\n```", 
-            r"```\s*html\s*\n(.*?)\n```",
-            r"```\s*\n(<!DOCTYPE.*?)\n```",
-        ]
+        # Lowercased copy computed once and reused for case-insensitive lookups
+        lower = response.lower()
         
-        for pattern in html_block_patterns:
-            match = re.search(pattern, response, re.DOTALL | re.IGNORECASE)
-            if match:
-                html_content = match.group(1).strip()
-                logger.info(f"Found HTML in code block using pattern: {pattern[:20]}...")
-                return self._fix_encoding(html_content)
+        # Method 1: Check for an HTML code block (```html ... ``` or ``` <!DOCTYPE ... ```)
+        html_content = self._find_html_code_block(response, lower)
+        if html_content is not None:
+            logger.info("Found HTML in code block")
+            return self._fix_encoding(html_content)
         
         # Method 2: Look for direct HTML content
-        html_start_patterns = [
-            r"(<!DOCTYPE\s+html.*)",
-            r"(<html[^>]*>.*)",
-            r"(<!doctype\s+html.*)"
-        ]
-        
-        for pattern in html_start_patterns:
-            match = re.search(pattern, response, re.DOTALL | re.IGNORECASE)
-            if match:
-                html_content = match.group(1).strip()
-                logger.info(f"Found direct HTML using pattern: {pattern[:20]}...")
-                return self._fix_encoding(html_content)
+        start_pos = self._find_doctype_html(lower)
+        if start_pos == -1:
+            html_pos = lower.find("<html")
+            if html_pos != -1 and lower.find(">", html_pos) != -1:
+                start_pos = html_pos
+        if start_pos != -1:
+            logger.info("Found direct HTML at position {}", start_pos)
+            return self._fix_encoding(response[start_pos:].strip())
         
         # Method 3: Fallback - look for any HTML-like content
-        if "<html" in response.lower() or "<!doctype" in response.lower():
+        if "<html" in lower or "<!doctype" in lower:
             # Find the start position
             start_markers = ["<!DOCTYPE", "<!doctype", "<html", "<HTML"]
             start_pos = -1
@@ -327,198 +284,249 @@ class CreateHtmlTool(BaseTool):
             
             if start_pos != -1:
                 html_content = response[start_pos:].strip()
-                logger.info(f"Found HTML using fallback method at position {start_pos}")
+                logger.info("Found HTML using fallback method at position {}", start_pos)
                 return self._fix_encoding(html_content)
         
         # Method 4: Last resort - return full response
         logger.warning("No clear HTML structure found, returning full response")
         return self._fix_encoding(response)
+
+    @staticmethod
+    def _skip_whitespace(text: str, pos: int) -> int:
+        """Return the index of the first non-whitespace character at or after pos"""
+        end = len(text)
+        while pos < end and text[pos].isspace():
+            pos += 1
+        return pos
+
+    def _find_html_code_block(self, response: str, lower: str) -> Optional[str]:
+        """Scan the ``` fences once, preferring an ```html block over a bare block starting with <!DOCTYPE"""
+        doctype_block = None
+        fence = response.find("```")
+        while fence != -1:
+            after_fence = fence + 3
+            lang_start = self._skip_whitespace(response, after_fence)
+            is_html_block = lower.startswith("html", lang_start)
+            header_end = lang_start + 4 if is_html_block else after_fence
+            
+            # The fence header must end with a newline; content starts after the whitespace run
+            content_start = self._skip_whitespace(response, header_end)
+            newline = response.rfind("\n", header_end, content_start)
+            if newline != -1 and (is_html_block or doctype_block is None):
+                close = response.find("\n```", newline + 1)
+                if (
+                    close == -1
+                    and is_html_block
+                    and newline == content_start - 1
+                    and response.startswith("```", content_start)
+                    and response.rfind("\n", header_end, newline) != -1
+                ):
+                    # Only blank lines between the header and the closing fence: an empty block
+                    return ""
+                if close != -1:
+                    if is_html_block:
+                        return response[newline + 1:close].strip()
+                    if response[content_start - 1] == "\n" and lower.startswith("<!doctype", content_start):
+                        doctype_block = response[newline + 1:close].strip()
+            
+            # Runs of more than three backticks hold overlapping fences, so step one character
+            fence = response.find("```", fence + 1)
+        return doctype_block
+
+    def _find_doctype_html(self, lower: str) -> int:
+        """Find the first '<!doctype' followed by whitespace and 'html', or -1"""
+        pos = lower.find("<!doctype")
+        while pos != -1:
+            name_start = pos + 9
+            html_start = self._skip_whitespace(lower, name_start)
+            if html_start > name_start and lower.startswith("html", html_start):
+                return pos
+            pos = lower.find("<!doctype", name_start)
+        return -1
     
     def _sanitize_data_for_js(self, data: Any) -> Any:
-        """Recursively sanitize data to prevent JavaScript injection issues"""
+        """Sanitize data to prevent JavaScript injection issues
+
+        Only extremely long strings are truncated; escaping is left to the JSON encoder.
+        The data is walked once with an explicit stack, and copied only when a string
+        actually needs truncating, so the common case returns the input untouched.
+        """
+        stack = [data]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, dict):
+                stack.extend(obj.values())
+            elif isinstance(obj, list):
+                stack.extend(obj)
+            elif isinstance(obj, str) and len(obj) > _MAX_JS_STRING_LENGTH:
+                return self._truncate_long_strings(data)
+        return data
+
+    def _truncate_long_strings(self, data: Any) -> Any:
+        """Return a copy of data with strings longer than the limit truncated"""
         if isinstance(data, dict):
-            return {k: self._sanitize_data_for_js(v) for k, v in data.items()}
+            return {k: self._truncate_long_strings(v) for k, v in data.items()}
         elif isinstance(data, list):
-            return [self._sanitize_data_for_js(item) for item in data]
-        elif isinstance(data, str):
-            # Only truncate extremely long strings, let json.dumps handle escaping
-            if len(data) > 20000:  # 增加长度限制，避免过度截断
-                return data[:19977] + "..."
-            return data
-        else:
-            return data
+            return [self._truncate_long_strings(item) for item in data]
+        elif isinstance(data, str) and len(data) > _MAX_JS_STRING_LENGTH:
+            return data[:_MAX_JS_STRING_LENGTH - 23] + "..."
+        return data
     
     def _inject_data_into_html(self, html_content: str, data: Dict[str, Any]) -> str:
         """Inject data into HTML template with enhanced robustness and validation"""
+        logger.info("Starting data injection into HTML...")
+        
+        # Sanitize data first to prevent injection issues
+        sanitized_data = self._sanitize_data_for_js(data)
+        logger.opt(lazy=True).info("Data sanitized, keys: {}", lambda: list(sanitized_data.keys()) if isinstance(sanitized_data, dict) else 'non-dict')
+        
+        # Serialize data for JavaScript injection, keys sorted for stable output; the page
+        # only parses it, so it is written without indentation
         try:
-            import json
-            logger.info("Starting data injection into HTML...")
-            
-            # Sanitize data first to prevent injection issues
-            sanitized_data = self._sanitize_data_for_js(data)
-            logger.info(f"Data sanitized, keys: {list(sanitized_data.keys()) if isinstance(sanitized_data, dict) else 'non-dict'}")
-            
-            # Properly serialize data with safe escaping for JavaScript injection
-            safe_data = json.dumps(
-                sanitized_data, 
-                ensure_ascii=True,  # 确保非ASCII字符被转义
-                indent=2, 
-                separators=(',', ': '),
-                sort_keys=True  # 排序键值
-            )
-            logger.info(f"Data serialized to JSON, length: {len(safe_data)}")
-            
-            injection_success = False
-            
+            safe_data = _dumps_json(sanitized_data, sort_keys=True, compact=True)
+        except (TypeError, ValueError):
+            logger.exception("Failed to serialize report data, injecting an empty object")
+            # A bare placeholder left in a script is a ReferenceError, so resolve it anyway
+            return html_content.replace(_DATA_PLACEHOLDER, "{}")
+        logger.info("Data serialized to JSON, length: {}", len(safe_data))
+        
+        # Insert the JSON verbatim so its backslash escapes are not treated as regex escapes
+        def expand(match, template):
+            return match.expand(template).replace("{data}", safe_data, 1)
+        
+        injection_success = False
+        
+        if _DATA_PLACEHOLDER in html_content:
+            # Fast path: the template placeholder marks exactly where the data goes. Every
+            # occurrence is replaced, as a bare placeholder left in a script is a ReferenceError
+            placeholder_count = html_content.count(_DATA_PLACEHOLDER)
+            html_content = html_content.replace(_DATA_PLACEHOLDER, safe_data)
+            logger.info("Injected data at {} template placeholder(s)", placeholder_count)
+            injection_success = True
+        else:
             # 更健壮的现有数据检测
-            existing_patterns = [
-                r'\b(?:let|const|var)\s+reportData\s*=',
-                r'window\.(?:pageData|reportData)\s*='
-            ]
-            
-            existing_matches = []
-            for pattern in existing_patterns:
-                matches = re.findall(pattern, html_content, re.IGNORECASE)
-                existing_matches.extend(matches)
-            
+            existing_matches = [m.group(0) for m in _DATA_DECL_RE.finditer(html_content)]
+        
             has_existing_data = len(existing_matches) > 0
-            logger.info(f"Existing data declarations found: {len(existing_matches)} - {existing_matches}")
-            
+            logger.opt(lazy=True).info("Existing data declarations found: {} - {}", lambda: len(existing_matches), lambda: existing_matches)
+        
             if has_existing_data:
                 logger.info("Attempting to replace existing data declarations...")
-                
+            
                 # 更精确的替换模式，支持多行和复杂对象
-                replacement_patterns = [
-                    # 匹配 const/let/var reportData = { ... }; 格式
-                    (r'(\b(?:const|let|var)\s+reportData\s*=\s*)\{[\s\S]*?\}(\s*;?)', f'\\1{safe_data}\\2'),
-                    # 匹配 window.pageData = { ... }; 格式
-                    (r'(window\.(?:pageData|reportData)\s*=\s*)\{[\s\S]*?\}(\s*;?)', f'\\1{safe_data}\\2'),
-                    # 匹配注释格式的占位符
-                    (r'(\b(?:const|let|var)\s+reportData\s*=\s*)\{\}(\s*;?\s*//[^\n]*)', f'\\1{safe_data}\\2'),
-                ]
-                
-                for i, (pattern, replacement) in enumerate(replacement_patterns):
-                    matches = re.findall(pattern, html_content, re.DOTALL | re.IGNORECASE)
-                    if matches:
-                        logger.info(f"Pattern {i+1} matched {len(matches)} times: {pattern[:50]}...")
-                        html_content = re.sub(pattern, replacement, html_content, count=1, flags=re.DOTALL | re.IGNORECASE)
-                        logger.info(f"Successfully replaced existing data using pattern {i+1}")
+                for i, (pattern, replacement) in enumerate(_REPLACEMENT_RES):
+                    # subn both finds and replaces the first match in one scan
+                    html_content, replaced = pattern.subn(lambda m: expand(m, replacement), html_content, count=1)
+                    if replaced:
+                        logger.info("Successfully replaced existing data using pattern {}: {}...", i+1, pattern.pattern[:50])
                         injection_success = True
                         break
-                
+            
             else:
                 logger.info("No existing data found, attempting fresh injection...")
-                
-                # 更全面的注入点查找
-                injection_patterns = [
-                    # 空对象占位符
-                    (r'\b(const|let|var)\s+reportData\s*=\s*\{\}\s*;', f'\\1 reportData = {safe_data};'),
-                    (r'window\.(pageData|reportData)\s*=\s*\{\}\s*;', f'window.\\1 = {safe_data};'),
-                    # 带注释的占位符
-                    (r'(\b(?:const|let|var)\s+reportData\s*=\s*)\{\}(\s*;?\s*//[^\n]*)', f'\\1{safe_data}\\2'),
-                    # 模板中的特殊注释
-                    (r'//\s*页面数据注入点[^\n]*\n', f'// 页面数据注入点\n        const reportData = {safe_data};\n'),
-                ]
-                
-                for i, (pattern, replacement) in enumerate(injection_patterns):
-                    matches = re.findall(pattern, html_content, re.IGNORECASE)
-                    if matches:
-                        logger.info(f"Injection pattern {i+1} matched {len(matches)} times: {pattern[:50]}...")
-                        html_content = re.sub(pattern, replacement, html_content, count=1, flags=re.IGNORECASE)
-                        logger.info(f"Successfully injected data using pattern {i+1}")
-                        injection_success = True
-                        break
             
-            # 增强的fallback机制
-            if not injection_success:
-                logger.warning("Standard injection failed, attempting enhanced fallback...")
-                
-                # 查找所有可能的script标签
-                script_patterns = [
-                    r'<script[^>]*>\s*',  # 任何script标签开始
-                    r'<script>\s*',       # 简单script标签
-                ]
-                
-                for pattern in script_patterns:
-                    match = re.search(pattern, html_content, re.IGNORECASE)
-                    if match:
-                        insertion_point = match.end()
-                        data_injection = f"\n        // 页面数据全局变量 - 自动注入\n        const reportData = {safe_data};\n"
-                        html_content = html_content[:insertion_point] + data_injection + html_content[insertion_point:]
-                        logger.info(f"Successfully injected data using fallback at position {insertion_point}")
+                # 更全面的注入点查找
+                for i, (pattern, replacement) in enumerate(_INJECTION_RES):
+                    html_content, replaced = pattern.subn(lambda m: expand(m, replacement), html_content, count=1)
+                    if replaced:
+                        logger.info("Successfully injected data using pattern {}: {}...", i+1, pattern.pattern[:50])
                         injection_success = True
                         break
-            
-            # 最终验证
-            if injection_success:
-                # 检查重复声明
-                reportdata_declarations = re.findall(r'\b(?:let|const|var)\s+reportData\s*=', html_content, re.IGNORECASE)
-                window_declarations = re.findall(r'window\.(?:pageData|reportData)\s*=', html_content, re.IGNORECASE)
-                
-                total_declarations = len(reportdata_declarations) + len(window_declarations)
-                
-                if total_declarations > 1:
-                    logger.error(f"⚠️ Multiple data declarations detected: {total_declarations} (reportData: {len(reportdata_declarations)}, window: {len(window_declarations)})")
-                    # 尝试清理重复声明
-                    html_content = self._cleanup_duplicate_declarations(html_content)
-                else:
-                    logger.info(f"✅ Data injection successful, total declarations: {total_declarations}")
-                
-                # 验证JSON格式
-                try:
-                    json.loads(safe_data)
-                    logger.info("✅ Injected data is valid JSON")
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ Injected data is invalid JSON: {e}")
-                    
+        
+        # 增强的fallback机制
+        if not injection_success:
+            logger.warning("Standard injection failed, attempting enhanced fallback...")
+            
+            # 查找所有可能的script标签
+            for pattern in _SCRIPT_TAG_RES:
+                match = pattern.search(html_content)
+                if match:
+                    insertion_point = match.end()
+                    data_injection = f"\n        // 页面数据全局变量 - 自动注入\n        const reportData = {safe_data};\n"
+                    # One join builds the result without the intermediate head+injection string
+                    html_content = "".join((html_content[:insertion_point], data_injection, html_content[insertion_point:]))
+                    logger.info("Successfully injected data using fallback at position {}", insertion_point)
+                    injection_success = True
+                    break
+        
+        # 最终验证
+        if injection_success:
+            # 检查重复声明
+            declaration_kinds = [m.lastgroup for m in _DATA_DECL_RE.finditer(html_content)]
+            reportdata_count = declaration_kinds.count("report")
+            window_count = len(declaration_kinds) - reportdata_count
+            
+            total_declarations = len(declaration_kinds)
+            
+            if total_declarations > 1:
+                logger.error(f"⚠️ Multiple data declarations detected: {total_declarations} (reportData: {reportdata_count}, window: {window_count})")
+                # 尝试清理重复声明
+                html_content = self._cleanup_duplicate_declarations(html_content)
             else:
-                logger.error("❌ All injection methods failed")
+                logger.info("✅ Data injection successful, total declarations: {}", total_declarations)
                 
-            return html_content
+        else:
+            logger.error("❌ All injection methods failed")
             
-        except Exception as e:
-            logger.error(f"Failed to inject data into HTML: {e}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            return html_content
+        return html_content
 
     def _fix_encoding(self, html_content: str) -> str:
         """Fix potential encoding issues in HTML content with enhanced validation"""
         try:
             logger.info("Starting HTML encoding fix...")
             
-            # Check if charset already exists and is correct
-            charset_pattern = r'<meta\s+charset\s*=\s*["\']?([^"\'>\s]+)["\']?[^>]*>'
-            charset_matches = re.findall(charset_pattern, html_content, re.IGNORECASE)
+            head_match = _HEAD_TAG_RE.search(html_content)
+            
+            # Common case: a single UTF-8 declaration inside <head>, nothing to fix. Only the
+            # <head> section is scanned; browsers ignore charset declarations in the body, so
+            # the rest of a large page is not searched
+            if head_match:
+                head_close = _HEAD_CLOSE_RE.search(html_content, head_match.end())
+                if head_close:
+                    head_matches = list(
+                        _CHARSET_META_RE.finditer(html_content, 0, head_close.end())
+                    )
+                    if (
+                        len(head_matches) == 1
+                        and head_matches[0].group(0) == '<meta charset="UTF-8">'
+                        and head_matches[0].start() >= head_match.end()
+                    ):
+                        logger.info("UTF-8 charset declaration already in place")
+                        return html_content
             
+            # Check if charset already exists and is correct
+            charset_matches = [m for m in _CHARSET_META_RE.finditer(html_content)]
+            
+            if (
+                len(charset_matches) == 1
+                and head_match
+                and charset_matches[0].group(0) == '<meta charset="UTF-8">'
+                and charset_matches[0].start() >= head_match.end()
+            ):
+                logger.info("UTF-8 charset declaration already in place")
+                return html_content
+            
+            charset_matches = [m.group(1) for m in charset_matches]
             if charset_matches:
-                logger.info(f"Found existing charset declarations: {charset_matches}")
+                logger.info("Found existing charset declarations: {}", charset_matches)
                 # Remove all existing charset declarations first
-                html_content = re.sub(
-                    r'<meta\s+charset\s*=\s*["\']?[^"\'>\s]+["\']?[^>]*>',
-                    '',
-                    html_content,
-                    flags=re.IGNORECASE
-                )
+                html_content = _CHARSET_META_RE.sub('', html_content)
                 logger.info("Removed existing charset declarations")
             
             # Add single UTF-8 charset declaration after <head>
-            head_pattern = r'(<head[^>]*>)'
-            if re.search(head_pattern, html_content, re.IGNORECASE):
-                html_content = re.sub(
-                    head_pattern,
+            if head_match:
+                html_content = _HEAD_TAG_RE.sub(
                     r'\1\n    <meta charset="UTF-8">',
                     html_content,
                     count=1,  # Only replace the first occurrence
-                    flags=re.IGNORECASE
                 )
                 logger.info("Added UTF-8 charset declaration after <head>")
             else:
                 logger.warning("No <head> tag found, cannot add charset declaration")
             
             # Validate the result
-            final_charset_count = len(re.findall(charset_pattern, html_content, re.IGNORECASE))
-            logger.info(f"Final charset declaration count: {final_charset_count}")
+            final_charset_count = len(_CHARSET_META_RE.findall(html_content))
+            logger.info("Final charset declaration count: {}", final_charset_count)
             
             if final_charset_count > 1:
                 logger.warning(f"Multiple charset declarations detected: {final_charset_count}")
@@ -534,30 +542,18 @@ class CreateHtmlTool(BaseTool):
         try:
             logger.info("Cleaning up duplicate data declarations...")
             
-            # Find all reportData declarations
-            reportdata_pattern = r'\b(const|let|var)\s+reportData\s*=\s*\{[\s\S]*?\}\s*;?'
-            window_pattern = r'window\.(pageData|reportData)\s*=\s*\{[\s\S]*?\}\s*;?'
-            
-            reportdata_matches = list(re.finditer(reportdata_pattern, html_content, re.IGNORECASE))
-            window_matches = list(re.finditer(window_pattern, html_content, re.IGNORECASE))
-            
-            logger.info(f"Found {len(reportdata_matches)} reportData declarations and {len(window_matches)} window declarations")
-            
-            # Keep only the first reportData declaration
-            if len(reportdata_matches) > 1:
-                # Remove all but the first
-                for match in reversed(reportdata_matches[1:]):
-                    start, end = match.span()
-                    html_content = html_content[:start] + html_content[end:]
-                    logger.info(f"Removed duplicate reportData declaration at position {start}-{end}")
-            
-            # Keep only the first window declaration
-            if len(window_matches) > 1:
-                # Remove all but the first
-                for match in reversed(window_matches[1:]):
-                    start, end = match.span()
-                    html_content = html_content[:start] + html_content[end:]
-                    logger.info(f"Removed duplicate window declaration at position {start}-{end}")
+            # Keep only the first reportData declaration and the first window declaration,
+            # each removed in a single substitution pass over the document
+            for label, pattern in (("reportData", _REPORTDATA_BLOCK_RE), ("window", _WINDOW_DATA_BLOCK_RE)):
+                seen = 0
+                
+                def keep_first(match):
+                    nonlocal seen
+                    seen += 1
+                    return match.group(0) if seen == 1 else ""
+                
+                html_content = pattern.sub(keep_first, html_content)
+                logger.info("Found {} {} declarations, removed {} duplicates", seen, label, max(seen - 1, 0))
             
             return html_content
             
@@ -569,11 +565,11 @@ class CreateHtmlTool(BaseTool):
         """Validate basic HTML structure"""
         try:
             # Check for basic HTML structure
-            has_doctype = bool(re.search(r'<!DOCTYPE\s+html', html_content, re.IGNORECASE))
-            has_html_tag = bool(re.search(r'<html[^>]*>', html_content, re.IGNORECASE))
-            has_head_tag = bool(re.search(r'<head[^>]*>', html_content, re.IGNORECASE))
-            has_body_tag = bool(re.search(r'<body[^>]*>', html_content, re.IGNORECASE))
-            has_charset = bool(re.search(r'<meta\s+charset', html_content, re.IGNORECASE))
+            has_doctype = bool(_DOCTYPE_RE.search(html_content))
+            has_html_tag = bool(_HTML_TAG_RE.search(html_content))
+            has_head_tag = bool(_HEAD_TAG_RE.search(html_content))
+            has_body_tag = bool(_BODY_TAG_RE.search(html_content))
+            has_charset = bool(_CHARSET_RE.search(html_content))
             
             validation_results = {
                 'doctype': has_doctype,
@@ -583,7 +579,7 @@ class CreateHtmlTool(BaseTool):
                 'charset': has_charset
             }
             
-            logger.info(f"HTML structure validation: {validation_results}")
+            logger.info("HTML structure validation: {}", validation_results)
             
             # All should be True for valid HTML
             is_valid = all(validation_results.values())
@@ -599,11 +595,11 @@ class CreateHtmlTool(BaseTool):
             return False
 
     def _is_report_path(self, filepath: str) -> bool:
-        """检查是否为报告路径"""
-        return filepath.startswith("report/") or "report" in filepath
+        """检查是否为报告路径（以report/开头的路径也包含report，一次子串查找即可）"""
+        return "report" in filepath
     
-    def _save_with_report_manager(self, html_content: str, filepath: str, data: Optional[Dict] = None) -> str:
-        """使用报告管理器保存HTML"""
+    async def _save_with_report_manager(self, html_bytes: bytes, filepath: str, data: Optional[Dict] = None) -> str:
+        """使用报告管理器保存已编码为UTF-8的HTML"""
         try:
             # 从数据中提取股票代码
             stock_code = "unknown"
@@ -614,7 +610,7 @@ class CreateHtmlTool(BaseTool):
             metadata = {
                 "original_path": filepath,
                 "content_type": "html",
-                "data_size": len(html_content.encode('utf-8')),
+                "data_size": len(html_bytes),
                 "has_data": bool(data),
                 "generated_by": "create_html_tool"
             }
@@ -622,19 +618,23 @@ class CreateHtmlTool(BaseTool):
             if data:
                 metadata["data_keys"] = list(data.keys()) if isinstance(data, dict) else []
             
-            # 使用新的HTML报告保存方法
-            success = report_manager.save_html_report(
+            # 文件名时间戳只取一次，保证返回的路径与实际写入的文件一致
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
+            
+            # 使用新的HTML报告保存方法，报告与元数据文件在工作线程中写入，不阻塞事件循环
+            success = await asyncio.to_thread(
+                report_manager.save_html_report,
                 stock_code=stock_code,
-                html_content=html_content,
-                metadata=metadata
+                html_content=html_bytes,
+                metadata=metadata,
+                timestamp=timestamp
             )
             
             if success:
                 # 生成预期的文件路径
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"html_{stock_code}_{timestamp}.html"
+                filename = report_manager.generate_filename("html", stock_code, timestamp)
                 saved_path = report_manager.get_report_path("html", filename)
-                logger.info(f"HTML report saved to: {saved_path}")
+                logger.info("HTML report saved to: {}", saved_path)
                 return f"HTML report saved to: {saved_path}"
             else:
                 return "Failed to save HTML report"
@@ -644,21 +644,26 @@ class CreateHtmlTool(BaseTool):
             logger.error(error_msg)
             return error_msg
 
-    async def _save_html_to_file(self, html_content: str, filepath: str) -> str:
-        """Save generated HTML to a file"""
+    async def _save_html_to_file(self, html_bytes: bytes, filepath: str) -> str:
+        """Save UTF-8 encoded HTML to a file"""
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
-
-            # Save with UTF-8 encoding
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(html_content)
+            # Write the bytes in a worker thread so the event loop is not blocked
+            await asyncio.to_thread(_write_file_bytes, filepath, html_bytes)
 
             return f"HTML successfully saved to: {filepath}"
         except Exception as e:
             logger.error(f"Error saving HTML file: {e}")
             return f"Failed to save HTML file: {e}"
 
+    async def _dispatch_save(self, html_content: str, output_path: str, data: Optional[Dict] = None) -> str:
+        """Save the page through the report manager for report paths, otherwise to output_path"""
+        # Encode once; both save paths and the size metadata use these bytes
+        html_bytes = html_content.encode("utf-8")
+        # 优先使用报告管理器保存
+        if self._is_report_path(output_path):
+            return await self._save_with_report_manager(html_bytes, output_path, data)
+        return await self._save_html_to_file(html_bytes=html_bytes, filepath=output_path)
+
     async def execute(
         self,
         request: str,
@@ -681,7 +686,7 @@ class CreateHtmlTool(BaseTool):
             ToolResult: Result containing the generated HTML or error message
         """
         try:
-            logger.info(f"Starting HTML generation for request: {request[:100]}...")
+            logger.info("Starting HTML generation for request: {}...", request[:100])
             
             # Validate input parameters
             if not request or not request.strip():
@@ -691,7 +696,7 @@ class CreateHtmlTool(BaseTool):
             additional_context = {}
             if data:
                 additional_context["data"] = data
-                logger.info(f"Data provided with keys: {list(data.keys()) if isinstance(data, dict) else 'non-dict'}")
+                logger.opt(lazy=True).info("Data provided with keys: {}", lambda: list(data.keys()) if isinstance(data, dict) else 'non-dict')
             if reference:
                 additional_context["reference"] = reference
                 logger.info("Reference design provided")
@@ -709,7 +714,7 @@ class CreateHtmlTool(BaseTool):
             if not html_content or not html_content.strip():
                 raise ValueError("Generated HTML content is empty")
             
-            logger.info(f"HTML generated successfully, length: {len(html_content)}")
+            logger.info("HTML generated successfully, length: {}", len(html_content))
             
             # Validate HTML structure
             is_valid_structure = self._validate_html_structure(html_content)
@@ -717,38 +722,45 @@ class CreateHtmlTool(BaseTool):
                 logger.warning("Generated HTML has structural issues, but proceeding...")
             
             # Inject data into HTML if available
+            data_injected = False
             if data:
                 logger.info("Injecting data into HTML...")
                 original_length = len(html_content)
                 html_content = self._inject_data_into_html(html_content, data)
-                logger.info(f"Data injection completed, length change: {len(html_content) - original_length}")
+                logger.info("Data injection completed, length change: {}", len(html_content) - original_length)
+                data_injected = True
+            elif _DATA_PLACEHOLDER in html_content:
+                # No data given: the template placeholder still has to become valid JavaScript
+                html_content = html_content.replace(_DATA_PLACEHOLDER, "{}")
+                logger.info("No data provided, template placeholder set to an empty object")
+                data_injected = True
+
+            # Save to file if path provided; the page is final now, so the write
+            # runs in the background while the final validation below is done
+            save_task = None
+            if output_path:
+                logger.info("Saving HTML to: {}", output_path)
+                save_task = asyncio.create_task(self._dispatch_save(html_content, output_path, data))
+                # Yield once so the task hands its write to the worker thread before validating
+                await asyncio.sleep(0)
             
-            # Final validation
-            final_validation = self._validate_html_structure(html_content)
-            logger.info(f"Final HTML validation: {'✅ PASSED' if final_validation else '⚠️ ISSUES DETECTED'}")
+            # Final validation, only needed when injection changed the page
+            final_validation = self._validate_html_structure(html_content) if data_injected else is_valid_structure
+            content_length = len(html_content)
+            logger.info("Final HTML validation: {}", '✅ PASSED' if final_validation else '⚠️ ISSUES DETECTED')
 
-            # Save to file if path provided
             result_message = ""
-            if output_path:
-                logger.info(f"Saving HTML to: {output_path}")
+            if save_task is not None:
                 try:
-                    # 优先使用报告管理器保存
-                    if self._is_report_path(output_path):
-                        save_result = self._save_with_report_manager(
-                            html_content, output_path, data
-                        )
-                    else:
-                        save_result = await self._save_html_to_file(
-                            html_content=html_content, filepath=output_path
-                        )
+                    save_result = await save_task
                     result_message = f"\n{save_result}"
-                    logger.info(f"File saved successfully: {save_result}")
+                    logger.info("File saved successfully: {}", save_result)
                 except Exception as save_error:
                     logger.error(f"Failed to save file: {save_error}")
                     result_message = f"\nWarning: Failed to save file - {save_error}"
 
             # Prepare success result
-            success_message = f"HTML generation successful, length: {len(html_content)} characters"
+            success_message = f"HTML generation successful, length: {content_length} characters"
             if not final_validation:
                 success_message += " (with structural warnings)"
             success_message += result_message
@@ -762,15 +774,13 @@ class CreateHtmlTool(BaseTool):
                     "saved_to": output_path if output_path else None,
                     "message": success_message,
                     "validation_passed": final_validation,
-                    "content_length": len(html_content)
+                    "content_length": content_length
                 }
             )
 
         except Exception as e:
             error_msg = f"HTML generation failed: {str(e)}"
-            logger.error(error_msg)
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
+            logger.exception(error_msg)
             
             # Return detailed error information
             return ToolResult(
@@ -783,3 +793,23 @@ class CreateHtmlTool(BaseTool):
                     "output_path": output_path
                 }
             )
+
+    async def execute_many(
+        self, tasks: List[Dict[str, Any]], max_concurrent: int = 8
+    ) -> List[ToolResult]:
+        """Run several independent HTML generations concurrently
+
+        Args:
+            tasks: Keyword arguments for each execute() call
+            max_concurrent: Maximum number of generations in flight at once
+
+        Returns:
+            ToolResult list in the same order as tasks
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def _run(task: Dict[str, Any]) -> ToolResult:
+            async with semaphore:
+                return await self.execute(**task)
+
+        return await asyncio.gather(*(_run(task) for task in tasks))
@@ -1,9 +1,9 @@
+import asyncio
 import json
-import time
 import traceback
 from datetime import datetime
 
-import requests
+import aiohttp
 
 
 ### 每日热门板块爬取
@@ -22,20 +22,24 @@ HEADERS = {
 
 
 def parse_jsonp(jsonp_str):
-    import re
-
-    match = re.search(r"\((.*)\)", jsonp_str)
-    if match:
-        return json.loads(match.group(1))
+    # 回调包裹的JSON位于第一个"("与最后一个")"之间，直接切片，无需正则
+    start = jsonp_str.find("(")
+    end = jsonp_str.rfind(")")
+    if start != -1 and end > start:
+        return json.loads(jsonp_str[start + 1 : end])
     return None
 
 
-def fetch_data(sector_type, url, max_retries=3, retry_delay=2):
+async def fetch_data_async(session, sector_type, url, max_retries=3, retry_delay=2):
+    """获取单个板块的数据，使用调用方传入的session，便于多个板块并发请求"""
     for attempt in range(1, max_retries + 1):
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=15)
-            resp.raise_for_status()
-            data = parse_jsonp(resp.text)
+            async with session.get(
+                url, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=15)
+            ) as resp:
+                resp.raise_for_status()
+                text = await resp.text()
+            data = parse_jsonp(text)
             if not data:
                 print(f"解析{sector_type}数据失败")
                 return []
@@ -43,11 +47,24 @@ def fetch_data(sector_type, url, max_retries=3, retry_delay=2):
         except Exception as e:
             print(f"获取{sector_type}数据失败: {e} (第{attempt}次尝试)")
             if attempt < max_retries:
-                time.sleep(retry_delay)
+                await asyncio.sleep(retry_delay)
             else:
                 return []
 
 
+async def _fetch_sections_async(sector_types):
+    """并发获取多个板块的原始数据，总耗时取决于最慢的一个请求"""
+    connector = aiohttp.TCPConnector(limit=8, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        raw_lists = await asyncio.gather(
+            *(
+                fetch_data_async(session, sector_type, API_URLS[sector_type])
+                for sector_type in sector_types
+            )
+        )
+    return dict(zip(sector_types, raw_lists))
+
+
 def simplify_sector_item(item):
     def to_float(val):
         try:
@@ -71,6 +88,8 @@ def get_all_section(sector_types=None):
     """
     获取所有类型板块数据，包括热门板块、概念板块、行业板块和地域板块
 
+    各板块并发请求。内部使用asyncio.run，需在没有运行中事件循环的线程里调用（如asyncio.to_thread）
+
     Args:
         sector_types (str, optional): 板块类型，可选值: 'all', 'hot', 'concept', 'regional', 'industry'，默认为None（等同于'all'）
 
@@ -106,11 +125,10 @@ def get_all_section(sector_types=None):
         if not valid_types:
             return {"success": False, "message": "没有提供有效的板块类型", "data": {}}
 
-        # 获取数据
+        # 获取数据，各板块并发请求
+        raw_data = asyncio.run(_fetch_sections_async(valid_types))
         all_data = {}
-        for sector_type in valid_types:
-            url = API_URLS[sector_type]
-            raw_list = fetch_data(sector_type, url)
+        for sector_type, raw_list in raw_data.items():
             all_data[sector_type] = [
                 simplify_sector_item(item) for item in raw_list if item
             ]
@@ -6,14 +6,16 @@
 API: https://push2.eastmoney.com/api/qt/stock/get
 """
 
+import asyncio
 import json
 import os
-import re
 import time
 import traceback
 from datetime import datetime
 
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
 
 
 # API URL - 上证指数(000001)资金流向
@@ -26,75 +28,90 @@ HEADERS = {
     "Accept": "application/json, text/javascript, */*; q=0.01",
 }
 
+# 复用同一会话，同一主机的连接与TLS握手在多次请求间共享
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_SESSION.mount(
+    "https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+)
+
+
+# 映射文件不存在或读取失败时使用的默认指数名称映射
+DEFAULT_INDEX_NAME_MAP = {
+    "000001": "上证指数",
+    "399001": "深证成指",
+    "399006": "创业板指",
+    "000300": "沪深300",
+    "000905": "中证500",
+    "000016": "上证50",
+    "000852": "中证1000",
+    "000688": "科创50",
+    "399673": "创业板50",
+}
+
 
-# 加载指数代码和名称映射
+# 加载指数代码和名称映射，模块导入时调用一次
 def load_index_map():
+    map_file = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "index_name_map.json"
+    )
     try:
-        map_file = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "index_name_map.json"
-        )
-        if os.path.exists(map_file):
-            with open(map_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        else:
-            # 如果映射文件不存在，返回默认映射
-            return {
-                "000001": "上证指数",
-                "399001": "深证成指",
-                "399006": "创业板指",
-                "000300": "沪深300",
-                "000905": "中证500",
-                "000016": "上证50",
-                "000852": "中证1000",
-                "000688": "科创50",
-                "399673": "创业板50",
-            }
+        # 直接打开，文件不存在时由异常处理，省去exists检查
+        with open(map_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return dict(DEFAULT_INDEX_NAME_MAP)
     except Exception as e:
         print(f"加载指数映射文件失败: {e}")
         # 返回默认映射
-        return {
-            "000001": "上证指数",
-            "399001": "深证成指",
-            "399006": "创业板指",
-            "000300": "沪深300",
-            "000905": "中证500",
-        }
+        return dict(DEFAULT_INDEX_NAME_MAP)
 
 
 # 加载指数名称映射
 INDEX_CODE_NAME_MAP = load_index_map()
 
 
+# 资金流向字段定义: (API字段, 结果字段)
+FLOW_FIELDS = (
+    ("f135", "今日主力净流入"),
+    ("f136", "今日主力流入"),
+    ("f137", "今日主力流出"),
+    ("f138", "今日超大单净流入"),
+    ("f139", "今日超大单流入"),
+    ("f140", "今日超大单流出"),
+    ("f141", "今日大单净流入"),
+    ("f142", "今日大单流入"),
+    ("f143", "今日大单流出"),
+    ("f144", "今日中单净流入"),
+    ("f145", "今日中单流入"),
+    ("f146", "今日中单流出"),
+    ("f147", "今日小单净流入"),
+    ("f148", "今日小单流入"),
+    ("f149", "今日小单流出"),
+)
+
+
 def parse_jsonp(jsonp_str):
     """解析JSONP响应为JSON数据"""
     try:
-        # 使用正则表达式提取JSON数据
-        match = re.search(r"jQuery[0-9_]+\((.*)\)", jsonp_str)
-        if match:
-            json_str = match.group(1)
-            return json.loads(json_str)
+        # JSONP形如 jQuery123_456({...})，JSON位于回调名之后的第一个"("与最后一个")"之间，直接切片；
+        # 回调名前可能带有空白或BOM，因此查找而不是要求以回调名开头
+        callback = jsonp_str.find("jQuery")
+        start = jsonp_str.find("(", callback)
+        end = jsonp_str.rfind(")")
+        if callback != -1 and start != -1 and end > start:
+            return json.loads(jsonp_str[start + 1 : end])
         else:
-            # 如果不是JSONP格式，尝试直接解析JSON
-            return json.loads(jsonp_str)
+            # 如果不是JSONP格式，尝试直接解析JSON（去掉可能的BOM）
+            return json.loads(jsonp_str.lstrip("\ufeff"))
     except Exception as e:
         print(f"解析JSONP失败: {e}")
         print(f"原始数据: {jsonp_str[:100]}...")  # 打印前100个字符用于调试
         return None
 
 
-def fetch_index_capital_flow(index_code="000001", max_retries=3, retry_delay=2):
-    """
-    获取指数资金流向数据
-
-    参数:
-        index_code: 指数代码，默认为上证指数(000001)
-        max_retries: 最大重试次数
-        retry_delay: 重试延迟时间(秒)
-
-    返回:
-        dict: 包含资金流向数据的字典
-    """
-    # 根据指数代码构建API URL
+def build_index_capital_flow_url(index_code, timestamp=None):
+    """根据指数代码构建API URL，附带时间戳防止缓存"""
     market = "1"  # 1:上海 0:深圳
     if index_code.startswith("39") or index_code.startswith("1"):
         market = "0"  # 深证指数
@@ -104,16 +121,33 @@ def fetch_index_capital_flow(index_code="000001", max_retries=3, retry_delay=2):
     )
 
     # 添加时间戳防止缓存
-    timestamp = int(time.time() * 1000)
+    if timestamp is None:
+        timestamp = int(time.time() * 1000)
     if "?" in url:
         url += f"&_={timestamp}"
     else:
         url += f"?_={timestamp}"
+    return url
+
+
+def fetch_index_capital_flow(index_code="000001", max_retries=3, retry_delay=2):
+    """
+    获取指数资金流向数据
+
+    参数:
+        index_code: 指数代码，默认为上证指数(000001)
+        max_retries: 最大重试次数
+        retry_delay: 重试延迟时间(秒)
+
+    返回:
+        dict: 包含资金流向数据的字典
+    """
+    url = build_index_capital_flow_url(index_code)
 
     # 请求数据
     for attempt in range(1, max_retries + 1):
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=15)
+            resp = _SESSION.get(url, timeout=15)
             resp.raise_for_status()
 
             # 解析响应数据
@@ -145,6 +179,61 @@ def fetch_index_capital_flow(index_code="000001", max_retries=3, retry_delay=2):
                 return None
 
 
+async def fetch_index_capital_flow_async(
+    session, index_code, url, max_retries=3, retry_delay=2
+):
+    """fetch_index_capital_flow的异步版本，使用调用方传入的session，只返回原始数据"""
+    for attempt in range(1, max_retries + 1):
+        try:
+            async with session.get(
+                url, headers=HEADERS, timeout=aiohttp.ClientTimeout(total=15)
+            ) as resp:
+                resp.raise_for_status()
+                text = await resp.text()
+
+            # 解析响应数据
+            data = parse_jsonp(text)
+            flow_data = data.get("data", {}) if data else None
+            if flow_data:
+                return flow_data
+            print(f"未获取到指数{index_code}资金流向数据 (第{attempt}次尝试)")
+        except Exception as e:
+            print(f"获取指数{index_code}资金流向数据失败: {e} (第{attempt}次尝试)")
+        if attempt < max_retries:
+            await asyncio.sleep(retry_delay)
+    return None
+
+
+async def fetch_index_capital_flows_async(codes):
+    """
+    并发获取多个指数的资金流向数据，总耗时取决于最慢的一个请求
+
+    参数:
+        codes: 指数代码列表
+
+    返回:
+        dict: 指数代码到处理后资金流向数据的映射，获取失败的指数值为None
+    """
+    # 同一批请求共用一个时间戳
+    timestamp = int(time.time() * 1000)
+    urls = [build_index_capital_flow_url(code, timestamp) for code in codes]
+
+    connector = aiohttp.TCPConnector(limit=8, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        raw_list = await asyncio.gather(
+            *(
+                fetch_index_capital_flow_async(session, code, url)
+                for code, url in zip(codes, urls)
+            )
+        )
+
+    # 数据处理是纯CPU操作，在全部请求返回后统一进行
+    return {
+        code: process_flow_data(raw, code) if raw else None
+        for code, raw in zip(codes, raw_list)
+    }
+
+
 def process_flow_data(data, index_code):
     """
     处理资金流向数据
@@ -156,25 +245,6 @@ def process_flow_data(data, index_code):
     返回:
         dict: 处理后的资金流向数据
     """
-    # 根据API返回的字段定义
-    field_mapping = {
-        "f135": "今日主力净流入",
-        "f136": "今日主力流入",
-        "f137": "今日主力流出",
-        "f138": "今日超大单净流入",
-        "f139": "今日超大单流入",
-        "f140": "今日超大单流出",
-        "f141": "今日大单净流入",
-        "f142": "今日大单流入",
-        "f143": "今日大单流出",
-        "f144": "今日中单净流入",
-        "f145": "今日中单流入",
-        "f146": "今日中单流出",
-        "f147": "今日小单净流入",
-        "f148": "今日小单流入",
-        "f149": "今日小单流出",
-    }
-
     # 获取指数名称
     index_name = INDEX_CODE_NAME_MAP.get(index_code, f"指数{index_code}")
 
@@ -186,14 +256,11 @@ def process_flow_data(data, index_code):
     }
 
     # 添加资金流向数据
-    for field, label in field_mapping.items():
+    for field, label in FLOW_FIELDS:
         # 将原始金额除以1亿，并保留2位小数
         if field in data:
-            value = data.get(field, 0)
-            if value:
-                result[label] = round(float(value) / 100000000, 2)  # 转换为亿元
-            else:
-                result[label] = 0
+            value = data[field]
+            result[label] = round(float(value) / 1e8, 2) if value else 0  # 转换为亿元
 
     return result
 
@@ -245,6 +312,75 @@ def get_index_capital_flow(index_code="000001"):
         }
 
 
+def get_index_capital_flows(codes=None):
+    """
+    批量获取多个指数的资金流向数据，各指数并发请求
+
+    内部使用asyncio.run，需在没有运行中事件循环的线程里调用（如asyncio.to_thread）
+
+    Args:
+        codes (list, optional): 指数代码列表，默认为None（获取映射表中的全部指数）
+
+    Returns:
+        dict: 以指数代码为键的资金流向数据
+
+    Raises:
+        RuntimeError: 在运行中的事件循环里调用时
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError(
+            "get_index_capital_flows不能在运行中的事件循环里调用，"
+            "请改用await fetch_index_capital_flows_async(codes)或asyncio.to_thread"
+        )
+
+    try:
+        if codes is None:
+            codes = list(INDEX_CODE_NAME_MAP.keys())
+        elif isinstance(codes, str):
+            codes = [code.strip() for code in codes.split(",") if code.strip()]
+        else:
+            codes = list(codes)
+
+        if not codes:
+            return {"success": False, "message": "没有提供有效的指数代码", "data": {}}
+
+        results = asyncio.run(fetch_index_capital_flows_async(codes))
+        all_data = {code: flow for code, flow in results.items() if flow}
+        failed = [code for code, flow in results.items() if not flow]
+
+        if not all_data:
+            return {
+                "success": False,
+                "message": f"获取指数{','.join(codes)}资金流向数据失败",
+                "data": {},
+            }
+
+        message = f"成功获取{len(all_data)}个指数资金流向数据"
+        if failed:
+            message += f"，{','.join(failed)}获取失败"
+
+        return {
+            "success": True,
+            "message": message,
+            "last_updated": datetime.now().isoformat(),
+            "data": all_data,
+        }
+    except Exception as e:
+        error_msg = f"批量获取指数资金流向数据时出错: {str(e)}"
+        print(error_msg)
+        print(traceback.format_exc())
+        return {
+            "success": False,
+            "message": error_msg,
+            "error": traceback.format_exc(),
+            "data": {},
+        }
+
+
 def main():
     """命令行调用入口函数"""
     import sys
@@ -7,12 +7,15 @@ API: https://push2.eastmoney.com/api/qt/clist/get
 """
 
 import json
-import re
 import time
 import traceback
 from datetime import datetime
+from functools import lru_cache
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.logger import logger
 
 
 # API URL - 个股资金流向
@@ -25,26 +28,94 @@ HEADERS = {
     "Accept": "application/json, text/javascript, */*; q=0.01",
 }
 
+# 复用同一会话，同一主机的连接与TLS握手在多次请求间共享
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_SESSION.mount(
+    "https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+)
+
+
+# 交易市场映射
+MARKET_MAP = {
+    0: "SZ",  # 深圳
+    1: "SH",  # 上海
+    105: "NQ",  # 纳斯达克
+    106: "NYSE",  # 纽交所
+    107: "AMEX",  # 美交所
+    116: "HK",  # 港股
+    156: "LN",  # 伦敦
+}
+
+
+@lru_cache(maxsize=1024)
+def _format_update_time(value):
+    """毫秒时间戳转为可读时间，同一批数据的更新时间大多相同，故缓存结果"""
+    try:
+        return datetime.fromtimestamp(int(value) / 1000).strftime("%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError, OverflowError, OSError):
+        return "-"
+
+
+def _to_wan_yuan(value):
+    """资金流入流出金额转换为万元"""
+    return round(float(value) / 10000, 2) if value else 0
+
+
+def _to_percent(value):
+    """百分比保留两位小数"""
+    return round(float(value), 2) if value else 0
+
+
+def _to_market(value):
+    """市场代码转换为市场类型"""
+    return MARKET_MAP.get(value, str(value))
+
+
+# 字段映射表: (API字段, 结果字段, 转换函数)
+FIELD_MAPPING = (
+    ("f12", "股票代码", None),
+    ("f14", "股票名称", None),
+    ("f2", "最新价", None),
+    ("f3", "涨跌幅", _to_percent),
+    ("f62", "主力净流入", _to_wan_yuan),
+    ("f184", "主力净占比", _to_percent),
+    ("f66", "超大单净流入", _to_wan_yuan),
+    ("f69", "超大单净占比", _to_percent),
+    ("f72", "大单净流入", _to_wan_yuan),
+    ("f75", "大单净占比", _to_percent),
+    ("f78", "中单净流入", _to_wan_yuan),
+    ("f81", "中单净占比", _to_percent),
+    ("f84", "小单净流入", _to_wan_yuan),
+    ("f87", "小单净占比", _to_percent),
+    ("f124", "更新时间", _format_update_time),
+    ("f1", "市场代码", None),
+    ("f13", "市场类型", _to_market),
+)
+
 
 def parse_jsonp(jsonp_str):
     """解析JSONP响应为JSON数据"""
     try:
-        # 使用正则表达式提取JSON数据
-        match = re.search(r"jQuery[0-9_]+\((.*)\)", jsonp_str)
-        if match:
-            json_str = match.group(1)
-            return json.loads(json_str)
+        # JSONP形如 jQuery123_456({...})，JSON位于回调名之后的第一个"("与最后一个")"之间，直接切片；
+        # 回调名前可能带有空白或BOM，因此查找而不是要求以回调名开头
+        callback = jsonp_str.find("jQuery")
+        start = jsonp_str.find("(", callback)
+        end = jsonp_str.rfind(")")
+        if callback != -1 and start != -1 and end > start:
+            return json.loads(jsonp_str[start + 1 : end])
         else:
-            # 如果不是JSONP格式，尝试直接解析JSON
-            return json.loads(jsonp_str)
+            # 如果不是JSONP格式，尝试直接解析JSON（去掉可能的BOM）
+            return json.loads(jsonp_str.lstrip("\ufeff"))
     except Exception as e:
-        print(f"解析JSONP失败: {e}")
-        print(f"原始数据: {jsonp_str[:100]}...")  # 打印前100个字符用于调试
+        logger.warning("解析JSONP失败: {}", e)
+        # 仅在开启DEBUG时才截取前100个字符用于调试
+        logger.opt(lazy=True).debug("原始数据: {}...", lambda: jsonp_str[:100])
         return None
 
 
 def fetch_stock_list_capital_flow(
-    page_size=50, page_num=1, max_retries=3, retry_delay=2
+    page_size=50, page_num=1, max_retries=3, retry_delay=2, now=None
 ):
     """
     获取股票列表的资金流向数据（按主力净流入排序）
@@ -54,6 +125,7 @@ def fetch_stock_list_capital_flow(
         page_num: 页码，默认第1页
         max_retries: 最大重试次数
         retry_delay: 重试延迟时间(秒)
+        now: 本次请求的时间戳(datetime)，默认取当前时间
 
     返回:
         dict: 包含股票列表资金流向数据的字典
@@ -73,13 +145,13 @@ def fetch_stock_list_capital_flow(
     # 请求数据
     for attempt in range(1, max_retries + 1):
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=15)
+            resp = _SESSION.get(url, timeout=15)
             resp.raise_for_status()
 
             # 解析响应数据
             data = parse_jsonp(resp.text)
             if not data:
-                print(f"解析个股资金流向数据失败 (第{attempt}次尝试)")
+                logger.warning("解析个股资金流向数据失败 (第{}次尝试)", attempt)
                 if attempt < max_retries:
                     time.sleep(retry_delay)
                     continue
@@ -88,7 +160,7 @@ def fetch_stock_list_capital_flow(
             # 提取资金流向数据
             stock_list = data.get("data", {}).get("diff", [])
             if not stock_list:
-                print(f"未获取到个股资金流向数据 (第{attempt}次尝试)")
+                logger.warning("未获取到个股资金流向数据 (第{}次尝试)", attempt)
                 if attempt < max_retries:
                     time.sleep(retry_delay)
                     continue
@@ -96,18 +168,18 @@ def fetch_stock_list_capital_flow(
 
             # 处理股票数据
             return process_stock_list_data(
-                stock_list, data.get("data", {}).get("total", 0)
+                stock_list, data.get("data", {}).get("total", 0), now
             )
 
         except Exception as e:
-            print(f"获取个股资金流向数据失败: {e} (第{attempt}次尝试)")
+            logger.warning("获取个股资金流向数据失败: {} (第{}次尝试)", e, attempt)
             if attempt < max_retries:
                 time.sleep(retry_delay)
             else:
                 return None
 
 
-def fetch_single_stock_capital_flow(stock_code, max_retries=3, retry_delay=2):
+def fetch_single_stock_capital_flow(stock_code, max_retries=3, retry_delay=2, now=None):
     """
     获取单个股票的资金流向数据
 
@@ -115,13 +187,19 @@ def fetch_single_stock_capital_flow(stock_code, max_retries=3, retry_delay=2):
         stock_code: 股票代码，如"000001"
         max_retries: 最大重试次数
         retry_delay: 重试延迟时间(秒)
+        now: 本次请求的时间戳(datetime)，默认取当前时间
 
     返回:
         dict: 包含单个股票资金流向数据的字典，如果未找到则返回None
     """
+    if now is None:
+        now = datetime.now()
+
     # 获取股票列表数据（多页搜索需要实现分页循环）
     for page in range(1, 10):  # 最多查找10页
-        stock_list = fetch_stock_list_capital_flow(50, page)
+        stock_list = fetch_stock_list_capital_flow(
+            50, page, max_retries, retry_delay, now
+        )
         if not stock_list:
             break
 
@@ -131,7 +209,7 @@ def fetch_single_stock_capital_flow(stock_code, max_retries=3, retry_delay=2):
                 return {
                     "success": True,
                     "message": f"成功获取股票{stock.get('股票名称')}({stock_code})资金流向数据",
-                    "last_updated": datetime.now().isoformat(),
+                    "last_updated": now.isoformat(),
                     "data": stock,
                 }
 
@@ -141,89 +219,37 @@ def fetch_single_stock_capital_flow(stock_code, max_retries=3, retry_delay=2):
     return {"success": False, "message": f"未找到股票{stock_code}的资金流向数据", "data": {}}
 
 
-def process_stock_list_data(stock_list, total_count):
+def process_stock_list_data(stock_list, total_count, now=None):
     """
     处理股票列表资金流向数据
 
     参数:
         stock_list: API返回的原始股票列表数据
         total_count: 总记录数
+        now: 本次请求的时间戳(datetime)，默认取当前时间
 
     返回:
         dict: 处理后的资金流向数据
     """
-    # 字段映射表
-    field_mapping = {
-        "f12": "股票代码",
-        "f14": "股票名称",
-        "f2": "最新价",
-        "f3": "涨跌幅",
-        "f62": "主力净流入",
-        "f184": "主力净占比",
-        "f66": "超大单净流入",
-        "f69": "超大单净占比",
-        "f72": "大单净流入",
-        "f75": "大单净占比",
-        "f78": "中单净流入",
-        "f81": "中单净占比",
-        "f84": "小单净流入",
-        "f87": "小单净占比",
-        "f124": "更新时间",
-        "f1": "市场代码",
-        "f13": "市场类型",
-    }
-
-    # 交易市场映射
-    market_map = {
-        0: "SZ",  # 深圳
-        1: "SH",  # 上海
-        105: "NQ",  # 纳斯达克
-        106: "NYSE",  # 纽交所
-        107: "AMEX",  # 美交所
-        116: "HK",  # 港股
-        156: "LN",  # 伦敦
-    }
+    if now is None:
+        now = datetime.now()
 
     # 初始化结果
     result = {
         "股票列表": [],
         "总数": total_count,
-        "更新时间": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "更新时间": now.strftime("%Y-%m-%d %H:%M:%S"),
     }
 
-    # 处理每支股票数据
+    # 处理每支股票数据，每行只做一次字典构建
     for stock_item in stock_list:
-        stock_data = {}
-
-        # 转换每个字段
-        for api_field, result_field in field_mapping.items():
-            if api_field in stock_item:
-                value = stock_item.get(api_field)
-
-                # 特殊处理的字段
-                if api_field == "f124":  # 更新时间
-                    try:
-                        timestamp = int(value) / 1000
-                        stock_data[result_field] = datetime.fromtimestamp(
-                            timestamp
-                        ).strftime("%Y-%m-%d %H:%M:%S")
-                    except:
-                        stock_data[result_field] = "-"
-                elif api_field in ["f62", "f66", "f72", "f78", "f84"]:  # 资金流入流出金额
-                    stock_data[result_field] = (
-                        round(float(value) / 10000, 2) if value else 0
-                    )  # 转换为万元
-                elif api_field in ["f3", "f184", "f69", "f75", "f81", "f87"]:  # 百分比
-                    stock_data[result_field] = (
-                        round(float(value), 2) if value else 0
-                    )  # 保留两位小数
-                elif api_field == "f13":  # 市场类型
-                    market_code = value
-                    stock_data[result_field] = market_map.get(
-                        market_code, str(market_code)
-                    )
-                else:
-                    stock_data[result_field] = value
+        stock_data = {
+            result_field: (
+                convert(stock_item[api_field]) if convert else stock_item[api_field]
+            )
+            for api_field, result_field, convert in FIELD_MAPPING
+            if api_field in stock_item
+        }
 
         # 添加完整的股票代码
         if "股票代码" in stock_data and "市场类型" in stock_data:
@@ -248,12 +274,15 @@ def get_stock_capital_flow(page_size=50, page_num=1, stock_code=None):
     返回:
         dict: 包含资金流向数据的字典
     """
+    # 整个请求共用同一个时间戳
+    now = datetime.now()
+
     try:
         # 获取数据（单只股票或列表）
         if stock_code:
-            result = fetch_single_stock_capital_flow(stock_code)
+            result = fetch_single_stock_capital_flow(stock_code, now=now)
         else:
-            flow_data = fetch_stock_list_capital_flow(page_size, page_num)
+            flow_data = fetch_stock_list_capital_flow(page_size, page_num, now=now)
             if not flow_data:
                 return {"success": False, "message": f"获取股票资金流向数据失败", "data": {}}
 
@@ -261,15 +290,14 @@ def get_stock_capital_flow(page_size=50, page_num=1, stock_code=None):
             result = {
                 "success": True,
                 "message": f"成功获取股票资金流向数据，共{flow_data.get('总数', 0)}条",
-                "last_updated": datetime.now().isoformat(),
+                "last_updated": now.isoformat(),
                 "data": flow_data,
             }
 
         return result
     except Exception as e:
         error_msg = f"获取股票资金流向数据时出错: {str(e)}"
-        print(error_msg)
-        print(traceback.format_exc())
+        logger.exception(error_msg)
         return {
             "success": False,
             "message": error_msg,
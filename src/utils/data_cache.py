@@ -0,0 +1,408 @@
+"""
+数据缓存与实时更新策略
+"""
+import atexit
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from src.logger import logger
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 缓存表：缓存时间单独成列并建索引，判断和清理过期都无需解析内容
+_CACHE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache ("
+    "key TEXT PRIMARY KEY, cache_time REAL NOT NULL, data_type TEXT NOT NULL, payload BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_cache_time ON cache (cache_time)",
+)
+
+# 内存层最多保留的条目数，超出时淘汰最久未使用且已落盘的条目
+_MEMORY_CACHE_SIZE = 256
+
+
+def _encode_cache(cache_data: Dict) -> bytes:
+    """缓存内容只供程序读取，使用紧凑的JSON编码（不缩进）"""
+    if orjson is not None:
+        return orjson.dumps(
+            cache_data,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+    return json.dumps(cache_data, ensure_ascii=False, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def _same_payload(cached_data: Dict, data: Any, metadata: Dict) -> bool:
+    """判断缓存内容是否未变化，无法直接比较的对象（如DataFrame）视为已变化"""
+    try:
+        return bool(cached_data["data"] == data and cached_data["metadata"] == metadata)
+    except (ValueError, TypeError):
+        return False
+
+
+def _decode_cache(raw: bytes) -> Dict:
+    """解析缓存内容"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class DataCacheManager:
+    """数据缓存管理器
+
+    写入先进入内存，脏数据由后台定时器批量写入（进程退出时也会写入），读取优先命中内存。
+    落盘数据存放在cache_dir下的单个SQLite文件中，缓存时间单独成列并建索引，过期清理只需DELETE。
+    """
+
+    def __init__(self, cache_dir: str = "cache", flush_interval: float = 3.0):
+        self.cache_dir = cache_dir
+        self.flush_interval = flush_interval
+        self.ensure_cache_dir()
+
+        # 缓存配置
+        self.cache_config = {
+            "chip_analysis": {"ttl": 300, "max_age": 900},  # 5分钟TTL，15分钟最大age
+            "stock_info": {"ttl": 60, "max_age": 180},  # 1分钟TTL，3分钟最大age
+            "sentiment_data": {"ttl": 600, "max_age": 1800},  # 10分钟TTL，30分钟最大age
+            "technical_analysis": {"ttl": 180, "max_age": 600},  # 3分钟TTL，10分钟最大age
+            "risk_control": {"ttl": 120, "max_age": 360},  # 2分钟TTL，6分钟最大age
+            # 1小时TTL，1天最大age；页面体积大，落盘后不常驻内存
+            "html_generation": {"ttl": 3600, "max_age": 86400, "in_memory": False},
+        }
+        # 预先展开为(ttl, max_age)元组，查询时不再构造默认字典
+        self._config_tuples = {
+            k: (v["ttl"], v["max_age"]) for k, v in self.cache_config.items()
+        }
+        self._default_config = (300, 900)
+        # 只在内存中暂存到落盘为止的数据类型
+        self._disk_only_types = {
+            k for k, v in self.cache_config.items() if not v.get("in_memory", True)
+        }
+
+        # 内存缓存（按最近使用排序）与待落盘的缓存键
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._dirty: set = set()
+        # 内容未变化、落盘时只需刷新时间戳的缓存键
+        self._touched: set = set()
+        self._lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+
+        # 连接在定时器线程与调用方线程间共享，由_db_lock串行化访问
+        self.db_path = os.path.join(self.cache_dir, "cache.sqlite3")
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _CACHE_SCHEMA:
+            self._conn.execute(statement)
+        atexit.register(self.flush)
+
+    def ensure_cache_dir(self):
+        """确保缓存目录存在"""
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def get_cache_key(self, data_type: str, stock_code: str, **kwargs) -> str:
+        """生成缓存键"""
+        # 绝大多数调用不带额外参数，直接拼接即可
+        if not kwargs:
+            return f"{data_type}_{stock_code}"
+        params = "_".join(f"{k}={kwargs[k]}" for k in sorted(kwargs))
+        return f"{data_type}_{stock_code}_{params}"
+
+    def get_cached_data(
+        self, data_type: str, stock_code: str, **kwargs
+    ) -> Optional[Dict]:
+        """获取缓存数据"""
+        try:
+            cache_key = self.get_cache_key(data_type, stock_code, **kwargs)
+            current_time = time.time()
+            ttl, max_age = self._config_tuples.get(data_type, self._default_config)
+
+            with self._lock:
+                cached_data = self._memory.get(cache_key)
+                if cached_data is not None:
+                    self._memory.move_to_end(cache_key)
+
+            if cached_data is None:
+                with self._db_lock:
+                    row = self._conn.execute(
+                        "SELECT cache_time, payload FROM cache WHERE key = ?",
+                        (cache_key,),
+                    ).fetchone()
+                if row is None:
+                    return None
+
+                # 先按缓存时间列判断是否硬过期，过期记录不再解析内容
+                cache_time, payload = row
+                if current_time - cache_time > max_age:
+                    self.remove_cache(cache_key)
+                    return None
+
+                cached_data = _decode_cache(payload)
+                # 内容未变化时只会刷新缓存时间列，以该列为准
+                cached_data["cache_time"] = cache_time
+                if data_type not in self._disk_only_types:
+                    with self._lock:
+                        self._memory.setdefault(cache_key, cached_data)
+                        self._evict_memory()
+
+            # 检查缓存是否过期
+            cache_time = cached_data.get("cache_time", 0)
+
+            # 硬过期检查
+            if current_time - cache_time > max_age:
+                self.remove_cache(cache_key)
+                return None
+
+            # 软过期检查 - 返回但标记为过期（返回副本，避免标记或调用方的修改写回缓存）
+            result = dict(cached_data)
+            result["data"] = copy.deepcopy(cached_data["data"])
+            result["is_stale"] = current_time - cache_time > ttl
+            return result
+
+        except Exception as e:
+            logger.warning("获取缓存数据失败: {}", e)
+            return None
+
+    def set_cached_data(self, data_type: str, stock_code: str, data: Any, **kwargs):
+        """设置缓存数据，写入内存并延迟落盘"""
+        try:
+            cache_key = self.get_cache_key(data_type, stock_code, **kwargs)
+
+            # 保存写入时的快照，调用方之后修改传入的对象不会影响缓存及其是否变化的判断
+            data = copy.deepcopy(data)
+            cache_data = {
+                "cache_time": time.time(),
+                "data_type": data_type,
+                "stock_code": stock_code,
+                "data": data,
+                "metadata": kwargs,
+            }
+
+            with self._lock:
+                previous = self._memory.get(cache_key)
+                self._memory[cache_key] = cache_data
+                self._memory.move_to_end(cache_key)
+                if (
+                    previous is not None
+                    and cache_key not in self._dirty
+                    and _same_payload(previous, data, kwargs)
+                ):
+                    # 与已落盘的内容相同，无需重新编码写入
+                    self._touched.add(cache_key)
+                else:
+                    self._dirty.add(cache_key)
+                self._evict_memory()
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+
+        except Exception as e:
+            logger.warning("设置缓存数据失败: {}", e)
+
+    def _evict_memory(self):
+        """内存层超过上限时淘汰最久未使用的条目，尚未落盘的条目保留（调用方持有_lock）"""
+        excess = len(self._memory) - _MEMORY_CACHE_SIZE
+        if excess <= 0:
+            return
+        for cache_key in list(self._memory):
+            if cache_key in self._dirty or cache_key in self._touched:
+                continue
+            del self._memory[cache_key]
+            excess -= 1
+            if excess == 0:
+                break
+
+    @staticmethod
+    def _encode_rows(entries):
+        """逐条编码待写入的缓存，无法编码的条目记录警告后跳过，不影响其他条目"""
+        rows = []
+        for cache_key, cache_data in entries:
+            try:
+                payload = _encode_cache(cache_data)
+            except Exception as e:
+                logger.warning("缓存内容无法编码，跳过写入: {}, {}", cache_key, e)
+                continue
+            rows.append(
+                (cache_key, cache_data["cache_time"], cache_data["data_type"], payload)
+            )
+        return rows
+
+    def flush(self):
+        """将内存中的脏缓存在一个事务中写入SQLite"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            pending = [
+                (key, self._memory[key]) for key in self._dirty if key in self._memory
+            ]
+            touched = [
+                (key, self._memory[key])
+                for key in self._touched - self._dirty
+                if key in self._memory
+            ]
+            self._dirty.clear()
+            self._touched.clear()
+
+        if not pending and not touched:
+            return
+
+        # 在事务外先编码，单条编码失败不会回滚整批写入
+        rows = self._encode_rows(pending)
+
+        try:
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                try:
+                    missing = []
+                    for cache_key, cache_data in touched:
+                        cursor = self._conn.execute(
+                            "UPDATE cache SET cache_time = ? WHERE key = ?",
+                            (cache_data["cache_time"], cache_key),
+                        )
+                        # 记录已被清理时按新数据完整写入
+                        if cursor.rowcount == 0:
+                            missing.append((cache_key, cache_data))
+                    rows.extend(self._encode_rows(missing))
+
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO cache (key, cache_time, data_type, payload) VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            logger.warning("写入缓存失败: {}", e)
+            # 写入失败时重新标记，下次落盘时重试
+            with self._lock:
+                self._dirty.update(key for key, _ in pending if key in self._memory)
+                self._touched.update(key for key, _ in touched if key in self._memory)
+            return
+
+        # 不常驻内存的数据落盘后移出内存（期间被重新写入的条目保留）
+        with self._lock:
+            for cache_key, cache_data in pending + touched:
+                if (
+                    cache_data["data_type"] in self._disk_only_types
+                    and self._memory.get(cache_key) is cache_data
+                    and cache_key not in self._dirty
+                    and cache_key not in self._touched
+                ):
+                    del self._memory[cache_key]
+
+    def remove_cache(self, cache_key: str):
+        """删除缓存"""
+        try:
+            with self._lock:
+                self._memory.pop(cache_key, None)
+                self._dirty.discard(cache_key)
+                self._touched.discard(cache_key)
+
+            with self._db_lock:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (cache_key,))
+        except Exception as e:
+            logger.warning("删除缓存失败: {}", e)
+
+    def cleanup_expired_cache(self):
+        """清理过期缓存"""
+        try:
+            # 先把待写入的缓存落盘，保证磁盘与内存一致
+            self.flush()
+            current_time = time.time()
+
+            default_max_age = self._default_config[1]
+            with self._lock:
+                for cache_key, cached_data in list(self._memory.items()):
+                    _, max_age = self._config_tuples.get(
+                        cached_data.get("data_type"), self._default_config
+                    )
+                    if current_time - cached_data.get("cache_time", 0) > max_age:
+                        del self._memory[cache_key]
+
+            # 每种数据类型按各自的最大age删除，未配置的类型使用默认值
+            data_types = list(self._config_tuples)
+            placeholders = ", ".join("?" * len(data_types))
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                try:
+                    self._conn.executemany(
+                        "DELETE FROM cache WHERE data_type = ? AND cache_time < ?",
+                        [
+                            (data_type, current_time - max_age)
+                            for data_type, (_, max_age) in self._config_tuples.items()
+                        ],
+                    )
+                    self._conn.execute(
+                        f"DELETE FROM cache WHERE data_type NOT IN ({placeholders}) AND cache_time < ?",
+                        (*data_types, current_time - default_max_age),
+                    )
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+
+        except Exception as e:
+            logger.warning("清理过期缓存失败: {}", e)
+
+
+@lru_cache(maxsize=1)
+def get_cache_manager() -> DataCacheManager:
+    """全局缓存管理器实例，首次使用时才创建（同时创建缓存目录和数据库）"""
+    return DataCacheManager()
+
+
+def with_cache(data_type: str):
+    """缓存装饰器"""
+
+    def decorator(func):
+        async def wrapper(self, stock_code: str, **kwargs):
+            # 尝试从缓存获取数据
+            cache_manager = get_cache_manager()
+            cached_data = cache_manager.get_cached_data(data_type, stock_code, **kwargs)
+
+            if cached_data and not cached_data.get("is_stale", False):
+                logger.debug("使用缓存数据: {}_{}", data_type, stock_code)
+                return cached_data["data"]
+
+            # 执行原始函数
+            try:
+                result = await func(self, stock_code, **kwargs)
+
+                # 缓存结果
+                if result:
+                    cache_manager.set_cached_data(
+                        data_type, stock_code, result, **kwargs
+                    )
+
+                return result
+
+            except Exception as e:
+                # 如果有过期但可用的缓存，返回缓存数据
+                if cached_data and cached_data.get("is_stale", False):
+                    logger.warning("使用过期缓存数据作为fallback: {}_{}", data_type, stock_code)
+                    return cached_data["data"]
+
+                raise e
+
+        return wrapper
+
+    return decorator
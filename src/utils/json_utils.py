@@ -0,0 +1,13 @@
+"""
+JSON serialization helpers shared by the tools and the MCP server.
+"""
+
+from typing import Any
+
+
+def json_default(obj: Any) -> Any:
+    """Convert values the stdlib encoder rejects: numpy scalars and arrays become
+    Python values, anything else its string form (as orjson's default=str does)"""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
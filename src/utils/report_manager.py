@@ -54,10 +54,10 @@ class SimpleReportManager:
         subdir = self.report_types[report_type]["subdir"]
         return self.base_dir / subdir / filename
     
-    def save_html_report(self, stock_code: str, html_content: str, 
-                        metadata: Optional[Dict] = None) -> bool:
-        """保存HTML报告"""
-        return self._save_report("html", stock_code, html_content, metadata)
+    def save_html_report(self, stock_code: str, html_content: str | bytes, 
+                        metadata: Optional[Dict] = None, timestamp: str | None = None) -> bool:
+        """保存HTML报告，内容可以是已编码为UTF-8的字节，可指定文件名中的时间戳"""
+        return self._save_report("html", stock_code, html_content, metadata, timestamp)
     
     def save_debate_report(self, stock_code: str, debate_data: Dict, 
                           metadata: Optional[Dict] = None) -> bool:
@@ -71,17 +71,17 @@ class SimpleReportManager:
         content = json.dumps(vote_data, ensure_ascii=False, indent=2)
         return self._save_report("vote", stock_code, content, metadata)
     
-    def _save_report(self, report_type: str, stock_code: str, content: str, 
-                    metadata: Optional[Dict] = None) -> bool:
+    def _save_report(self, report_type: str, stock_code: str, content: str | bytes, 
+                    metadata: Optional[Dict] = None, timestamp: str | None = None) -> bool:
         """通用的报告保存方法"""
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = self.generate_filename(report_type, stock_code, timestamp)
             file_path = self.get_report_path(report_type, filename)
             
-            # 保存报告内容
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            # 只编码一次（已是字节则直接使用），文件大小也由同一份字节得出
+            encoded = content if isinstance(content, bytes) else content.encode('utf-8')
+            with open(file_path, 'wb') as f:
+                f.write(encoded)
             
             # 保存元数据
             if metadata:
@@ -94,7 +94,7 @@ class SimpleReportManager:
                         "report_type": report_type,
                         "stock_code": stock_code,
                         "created_at": datetime.now().isoformat(),
-                        "file_size": len(content.encode('utf-8')),
+                        "file_size": len(encoded),
                         "filename": filename
                     }, f, ensure_ascii=False, indent=2)
             
@@ -0,0 +1,8 @@
+import os
+import sys
+
+
+# 测试直接以 src.* 导入项目模块
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
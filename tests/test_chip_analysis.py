@@ -0,0 +1,152 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from src.tool import chip_analysis
+from src.tool.chip_analysis import ChipAnalysisTool
+
+
+def _cyq_frame(symbol):
+    base = 10.0 if symbol == "600519" else 20.0
+    return pd.DataFrame(
+        {
+            "日期": pd.date_range("2024-01-01", periods=6).strftime("%Y-%m-%d"),
+            "获利比例": [40.0, 41.0, 42.0, 43.0, 44.0, 45.0],
+            "平均成本": [base, base + 0.1, base + 0.2, base + 0.3, base + 0.4, base + 0.5],
+            "90%成本集中度": [15.0, 15.5, 16.0, 16.5, 17.0, 17.0],
+            "70%成本集中度": [10.0, 11.0, 12.0, 12.5, 13.0, 13.0],
+        }
+    )
+
+
+class FakeAkshare:
+    """只实现筹码分析用到的三个接口，并记录调用次数"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = {"stock_cyq_em": 0, "stock_zh_a_spot_em": 0, "stock_zh_a_hist": 0}
+
+    def stock_cyq_em(self, symbol, adjust=""):
+        self.calls["stock_cyq_em"] += 1
+        if symbol in self.failing:
+            raise ConnectionError("cyq unavailable")
+        return _cyq_frame(symbol)
+
+    def stock_zh_a_spot_em(self):
+        self.calls["stock_zh_a_spot_em"] += 1
+        return pd.DataFrame(
+            {
+                "代码": ["600519", "000001"],
+                "名称": ["贵州茅台", "平安银行"],
+                "最新价": [13.0, 19.0],
+                "涨跌幅": [1.0, -1.0],
+            }
+        )
+
+    def stock_zh_a_hist(self, **kwargs):
+        self.calls["stock_zh_a_hist"] += 1
+        raise ConnectionError("hist unavailable")
+
+
+@pytest.fixture
+def fake_ak(monkeypatch):
+    fake = FakeAkshare(failing={"300750"})
+    monkeypatch.setattr(
+        chip_analysis,
+        "ak",
+        SimpleNamespace(
+            stock_cyq_em=fake.stock_cyq_em,
+            stock_zh_a_spot_em=fake.stock_zh_a_spot_em,
+            stock_zh_a_hist=fake.stock_zh_a_hist,
+        ),
+    )
+    # 各测试使用独立的缓存与锁（每个测试运行在新的事件循环中）
+    monkeypatch.setattr(chip_analysis, "_spot_cache", {"ts": 0.0, "df": None})
+    monkeypatch.setattr(chip_analysis, "_spot_lock", asyncio.Lock())
+    monkeypatch.setattr(chip_analysis, "_result_cache", chip_analysis.OrderedDict())
+    monkeypatch.setattr(chip_analysis, "_analysis_cache", chip_analysis.OrderedDict())
+    return fake
+
+
+def test_execute_many_keeps_order_and_shares_spot_snapshot(fake_ak):
+    tool = ChipAnalysisTool()
+    results = asyncio.run(tool.execute_many(["600519", "sz000001"]))
+
+    assert [r.output["stock_code"] for r in results] == ["600519", "sz000001"]
+    assert fake_ak.calls["stock_zh_a_spot_em"] == 1
+    assert fake_ak.calls["stock_cyq_em"] == 2
+
+    first = results[0].output
+    assert first["stock_info"]["name"] == "贵州茅台"
+    assert first["chip_data"]["data_source"] == "stock_cyq_em"
+    # 按列存储，只保留最近5个交易日
+    assert len(first["chip_data"]["chip_distribution"]["平均成本"]) == 5
+    assert first["analysis"]["basic_analysis"]["average_cost"] == 10.5
+    assert first["analysis"]["trapped_analysis"]["selling_pressure"] == "抛压中等"
+    assert first["analysis"]["trend_analysis"]["chip_migration"] == "筹码向上迁移"
+
+
+def test_execute_many_reuses_cached_chip_data(fake_ak):
+    tool = ChipAnalysisTool()
+    asyncio.run(tool.execute_many(["600519"]))
+    asyncio.run(tool.execute("600519"))
+    assert fake_ak.calls["stock_cyq_em"] == 1
+
+
+def test_execute_many_falls_back_without_caching_default(fake_ak):
+    tool = ChipAnalysisTool()
+    results = asyncio.run(tool.execute_many(["300750", "600519"]))
+
+    assert results[0].output["chip_data"]["data_source"] == "default_fallback"
+    assert results[1].output["chip_data"]["data_source"] == "stock_cyq_em"
+
+    # 兜底数据不缓存，再次调用会重新请求
+    asyncio.run(tool.execute("300750"))
+    assert fake_ak.calls["stock_cyq_em"] == 3
+
+
+def test_cached_analysis_is_not_shared_with_callers(fake_ak):
+    tool = ChipAnalysisTool()
+    first = asyncio.run(tool.execute("600519")).output["analysis"]
+    first["trading_signals"]["buy_signals"].append("caller mutation")
+    first["basic_analysis"]["average_cost"] = -1
+
+    second = asyncio.run(tool.execute("600519")).output["analysis"]
+    assert "caller mutation" not in second["trading_signals"]["buy_signals"]
+    assert second["basic_analysis"]["average_cost"] == 10.5
+
+
+def test_result_cache_is_bounded(fake_ak, monkeypatch):
+    monkeypatch.setattr(chip_analysis, "_RESULT_CACHE_SIZE", 3)
+    for i in range(5):
+        chip_analysis._cache_set(("chip", str(i)), i)
+    assert list(chip_analysis._result_cache) == [
+        ("chip", "2"),
+        ("chip", "3"),
+        ("chip", "4"),
+    ]
+
+    # 命中的条目移到末尾，最先淘汰最久未使用的条目
+    assert chip_analysis._cache_get(("chip", "2"), ttl=60) == 2
+    chip_analysis._cache_set(("chip", "5"), 5)
+    assert list(chip_analysis._result_cache) == [
+        ("chip", "4"),
+        ("chip", "2"),
+        ("chip", "5"),
+    ]
+
+
+def test_spot_failure_is_cached_briefly(fake_ak, monkeypatch):
+    def failing_spot():
+        fake_ak.calls["stock_zh_a_spot_em"] += 1
+        raise ConnectionError("spot unavailable")
+
+    monkeypatch.setattr(chip_analysis.ak, "stock_zh_a_spot_em", failing_spot)
+    tool = ChipAnalysisTool()
+    results = asyncio.run(tool.execute_many(["600519", "000001", "000002"]))
+
+    # 首次失败后其余股票直接使用失败缓存，不再逐个等待超时
+    assert fake_ak.calls["stock_zh_a_spot_em"] == 1
+    assert all(r.error is None for r in results)
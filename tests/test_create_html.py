@@ -0,0 +1,179 @@
+import asyncio
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.tool.create_html import (
+    _DATA_PLACEHOLDER,
+    _MAX_JS_STRING_LENGTH,
+    CreateHtmlTool,
+    _write_file_bytes,
+)
+
+
+# 原先基于正则的提取逻辑，作为扫描实现的对照
+_OLD_BLOCK_PATTERNS = (
+    r"```html\s*\n(.*?)\n```",
+    r"```HTML\s*\n(.*?)\n```",
+    r"```\s*html\s*\n(.*?)\n```",
+    r"```\s*\n(<!DOCTYPE.*?)\n```",
+)
+
+
+def _old_code_block(response):
+    for pattern in _OLD_BLOCK_PATTERNS:
+        match = re.search(pattern, response, re.DOTALL | re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def _old_doctype_pos(response):
+    match = re.search(r"(<!DOCTYPE\s+html.*)", response, re.DOTALL | re.IGNORECASE)
+    return match.start() if match else -1
+
+
+PAGE = '<!DOCTYPE html>\n<html><head><meta charset="UTF-8"></head><body></body></html>'
+
+RESPONSES = [
+    f"```html\n{PAGE}\n```",
+    f"Here is the page:\n```HTML\n{PAGE}\n```\nDone.",
+    f"```  html  \n\n{PAGE}\n```",
+    f"```\n{PAGE}\n```",
+    f"```\n  {PAGE}\n```",
+    f"```python\nprint(1)\n```\n```html\n{PAGE}\n```",
+    f"```\n{PAGE}\n```\n```html\n<p>preferred</p>\n```",
+    "```js\nx\n```\n```\n<!doctype html><p>lower</p>\n```",
+    f"```html {PAGE}\n```",
+    f"```html\n{PAGE}",
+    "```\nno html here\n```",
+    "plain text without fences",
+    "",
+    "``````",
+    "```html\n\n```",
+    "```html\n  \n\t\n```",
+    "```html\n```",
+    "```html\n\n```\n```html\n<p>second</p>\n```",
+    "```\n\n```",
+    "````HTML\n\n````",
+    "````html\n<p>four backticks</p>\n```",
+    "HTMLhtml````HTML\n\thtml\n```",
+]
+
+
+@pytest.fixture
+def tool():
+    # 跳过构造函数，避免初始化LLM客户端
+    return object.__new__(CreateHtmlTool)
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+def test_find_html_code_block_matches_old_regexes(tool, response):
+    assert tool._find_html_code_block(response, response.lower()) == _old_code_block(
+        response
+    )
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        PAGE,
+        "intro text " + PAGE,
+        "<!DOCTYPEhtml><!doctype  HTML>",
+        "<!doctype\n\thtml>",
+        "<!doctype xml><!DOCTYPE html>",
+        "<!doctype",
+        "<!doctype ",
+        "no doctype",
+    ],
+)
+def test_find_doctype_html_matches_old_regex(tool, response):
+    assert tool._find_doctype_html(response.lower()) == _old_doctype_pos(response)
+
+
+def test_inject_replaces_every_placeholder(tool):
+    html = f"<script>const reportData = {_DATA_PLACEHOLDER}; window.x = {_DATA_PLACEHOLDER};</script>"
+    result = tool._inject_data_into_html(html, {"名称": "平安银行"})
+    assert _DATA_PLACEHOLDER not in result
+    assert result.count('"名称"') == 2
+
+
+def test_execute_without_data_resolves_placeholder(tool):
+    page = PAGE.replace(
+        "<body></body>",
+        f"<body><script>const reportData = {_DATA_PLACEHOLDER};</script></body>",
+    )
+
+    async def fake_generate_html(**kwargs):
+        return page
+
+    tool.__dict__["_generate_html"] = fake_generate_html
+    result = asyncio.run(tool.execute(request="生成页面"))
+    assert "const reportData = {};" in result.output["html_content"]
+
+
+def test_write_file_bytes_concurrent_writers(tmp_path):
+    target = tmp_path / "report" / "page.html"
+    payloads = [bytes([65 + i]) * 50000 for i in range(12)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(lambda p: _write_file_bytes(str(target), p), payloads))
+
+    assert target.read_bytes() in payloads
+    assert os.listdir(target.parent) == ["page.html"]
+
+
+def test_write_file_bytes_removes_temp_file_on_failure(tmp_path):
+    target = tmp_path / "page.html"
+    with pytest.raises(TypeError):
+        _write_file_bytes(str(target), "not bytes")
+    assert os.listdir(tmp_path) == []
+
+
+def test_inject_resolves_placeholder_when_serialization_fails(tool, monkeypatch):
+    def fail(*args, **kwargs):
+        raise TypeError("not serializable")
+
+    monkeypatch.setattr("src.tool.create_html._dumps_json", fail)
+    html = f"<script>const reportData = {_DATA_PLACEHOLDER};</script>"
+    result = tool._inject_data_into_html(html, {"a": 1})
+    assert result == "<script>const reportData = {};</script>"
+
+
+def test_sanitized_strings_round_trip_through_json(tool):
+    special = "quote \" apostrophe ' backslash \\ newline \n tab \t 中文"
+    long_text = special * 2000
+    data = {"text": special, "items": [special, {"long": long_text}], "n": 1.5}
+
+    sanitized = tool._sanitize_data_for_js(data)
+    # 短字符串原样保留，输入不被修改
+    assert sanitized["text"] == special
+    assert data["items"][1]["long"] == long_text
+
+    html = f"<script>const reportData = {_DATA_PLACEHOLDER};</script>"
+    result = tool._inject_data_into_html(html, data)
+    payload = result[len("<script>const reportData = ") : -len(";</script>")]
+    decoded = json.loads(payload)
+
+    assert decoded["text"] == special
+    assert decoded["items"][0] == special
+    assert (
+        decoded["items"][1]["long"] == long_text[: _MAX_JS_STRING_LENGTH - 23] + "..."
+    )
+    assert decoded["n"] == 1.5
+
+
+@pytest.mark.parametrize(
+    "html, expected",
+    [
+        (PAGE, PAGE),
+        (
+            '<html><head><meta charset="gbk"></head><body></body></html>',
+            '<html><head>\n    <meta charset="UTF-8"></head><body></body></html>',
+        ),
+    ],
+)
+def test_fix_encoding_checks_head_section(tool, html, expected):
+    assert tool._fix_encoding(html) == expected
@@ -0,0 +1,28 @@
+from src.utils.data_cache import DataCacheManager
+
+
+def test_mutated_payload_is_written_again(tmp_path):
+    manager = DataCacheManager(cache_dir=str(tmp_path))
+    data = {"prices": [1.0]}
+    manager.set_cached_data("stock_info", "600519", data)
+    manager.flush()
+
+    # 调用方修改自己的对象后再次写入，应视为内容变化并落盘
+    data["prices"].append(2.0)
+    manager.set_cached_data("stock_info", "600519", data)
+    manager.flush()
+
+    reloaded = DataCacheManager(cache_dir=str(tmp_path))
+    assert reloaded.get_cached_data("stock_info", "600519")["data"] == {
+        "prices": [1.0, 2.0]
+    }
+
+
+def test_readers_cannot_change_cached_data(tmp_path):
+    manager = DataCacheManager(cache_dir=str(tmp_path))
+    manager.set_cached_data("stock_info", "600519", {"prices": [1.0]})
+
+    cached = manager.get_cached_data("stock_info", "600519")
+    cached["data"]["prices"].append(99.0)
+
+    assert manager.get_cached_data("stock_info", "600519")["data"] == {"prices": [1.0]}
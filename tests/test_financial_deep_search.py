@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from src.tool.financial_deep_search import (
+    get_section_data,
+    index_capital,
+    stock_capital,
+)
+
+
+PARSERS = [index_capital.parse_jsonp, stock_capital.parse_jsonp]
+
+
+@pytest.mark.parametrize("parse_jsonp", PARSERS)
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ('jQuery123_456({"data": {"f135": 1}});', {"data": {"f135": 1}}),
+        ('jQuery123_456({"data": {"f135": 1}})', {"data": {"f135": 1}}),
+        ('\n  jQuery1_2({"a": 1});\n', {"a": 1}),
+        ('﻿jQuery1_2({"a": 1});', {"a": 1}),
+        ('jQuery1_2({"text": "(括号)"});', {"text": "(括号)"}),
+        ('{"a": 1}', {"a": 1}),
+        ('﻿{"a": 1}', {"a": 1}),
+        ("", None),
+        ("not json", None),
+        ("jQuery1_2(", None),
+        ("jQuery1_2({broken});", None),
+    ],
+)
+def test_parse_jsonp(parse_jsonp, raw, expected):
+    assert parse_jsonp(raw) == expected
+
+
+@pytest.mark.parametrize(
+    "raw, expected",
+    [
+        ('jQuery371_1744621126576({"data": {"diff": []}});', {"data": {"diff": []}}),
+        ('\n jQuery1_2({"a": "(x)"})\n', {"a": "(x)"}),
+        ("no callback", None),
+    ],
+)
+def test_section_parse_jsonp(raw, expected):
+    assert get_section_data.parse_jsonp(raw) == expected
+
+
+def test_build_index_capital_flow_url_picks_market():
+    assert "secid=1.000001" in index_capital.build_index_capital_flow_url("000001", 1)
+    assert "secid=0.399001" in index_capital.build_index_capital_flow_url("399001", 1)
+    assert index_capital.build_index_capital_flow_url("000300", 42).endswith("&_=42")
+
+
+def test_process_flow_data_converts_present_fields():
+    result = index_capital.process_flow_data(
+        {"f135": 123456789012, "f136": 0, "f137": None, "f140": "500000000"}, "000001"
+    )
+    assert result["指数名称"] == index_capital.INDEX_CODE_NAME_MAP["000001"]
+    assert result["今日主力净流入"] == 1234.57
+    assert result["今日主力流入"] == 0
+    assert result["今日主力流出"] == 0
+    assert result["今日超大单流出"] == 5.0
+    assert "今日小单流出" not in result
+
+
+def test_load_index_map_returns_independent_dicts():
+    first = index_capital.load_index_map()
+    first["000001"] = "changed"
+    assert index_capital.load_index_map().get("000001") != "changed"
+
+
+def test_get_index_capital_flows_gathers_all_codes(monkeypatch):
+    requested = []
+
+    async def fake_fetch(session, index_code, url, max_retries=3, retry_delay=2):
+        requested.append((index_code, url))
+        return None if index_code == "399006" else {"f135": 100000000}
+
+    monkeypatch.setattr(index_capital, "fetch_index_capital_flow_async", fake_fetch)
+    result = index_capital.get_index_capital_flows(["000001", "399001", "399006"])
+
+    assert result["success"] is True
+    assert sorted(code for code, _ in requested) == ["000001", "399001", "399006"]
+    assert all(f".{code}&" in url for code, url in requested)
+    assert set(result["data"]) == {"000001", "399001"}
+    assert result["data"]["399001"]["今日主力净流入"] == 1.0
+    assert "399006获取失败" in result["message"]
+
+
+def test_get_index_capital_flows_all_failed(monkeypatch):
+    async def fake_fetch(session, index_code, url, max_retries=3, retry_delay=2):
+        return None
+
+    monkeypatch.setattr(index_capital, "fetch_index_capital_flow_async", fake_fetch)
+    result = index_capital.get_index_capital_flows("000001, 399001")
+    assert result == {
+        "success": False,
+        "message": "获取指数000001,399001资金流向数据失败",
+        "data": {},
+    }
+
+
+def test_get_index_capital_flows_rejects_running_loop():
+    async def call_inside_loop():
+        with pytest.raises(RuntimeError, match="事件循环"):
+            index_capital.get_index_capital_flows(["000001"])
+
+    asyncio.run(call_inside_loop())